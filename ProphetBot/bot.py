@@ -4,9 +4,12 @@ from aiopg.sa import create_engine
 from discord.ext import commands
 from timeit import default_timer as timer
 from sqlalchemy.schema import CreateTable
+from ProphetBot.cache import TTLCache, LevelHistogram, ShopRegistry
 from ProphetBot.compendium import Compendium
-from ProphetBot.constants import DB_URL
+from ProphetBot.constants import DB_URL, CHARACTER_CACHE_SIZE, CHARACTER_CACHE_TTL, GUILD_CACHE_SIZE, GUILD_CACHE_TTL, \
+    DASHBOARD_EDIT_WINDOW
 from ProphetBot.models.db_tables import *
+from ProphetBot.scheduler import EditScheduler
 
 log = logging.getLogger(__name__)
 
@@ -19,11 +22,25 @@ async def create_tables(conn: aiopg.sa.SAConnection):
 class BpBot(commands.Bot):
     db: aiopg.sa.Engine
     compendium: Compendium
+    character_cache: TTLCache
+    guild_cache: TTLCache
+    dashboard_edits: EditScheduler
+    dashboard_cache: dict
+    level_histograms: dict[int, LevelHistogram]
+    shop_registry: ShopRegistry
+    last_messages: dict
 
     # Extending/overriding discord.ext.commands.Bot
     def __init__(self, **options):
         super(BpBot, self).__init__(**options)
         self.compendium = Compendium()
+        self.character_cache = TTLCache("Characters", CHARACTER_CACHE_SIZE, CHARACTER_CACHE_TTL)
+        self.guild_cache = TTLCache("Guilds", GUILD_CACHE_SIZE, GUILD_CACHE_TTL)
+        self.dashboard_edits = EditScheduler("Dashboard edits", DASHBOARD_EDIT_WINDOW)
+        self.dashboard_cache = dict()
+        self.level_histograms = dict()
+        self.shop_registry = ShopRegistry()
+        self.last_messages = dict()
 
     async def on_ready(self):
         start = timer()
@@ -0,0 +1,194 @@
+import asyncio
+import copy
+from collections import OrderedDict
+from time import monotonic
+from typing import Any, Callable, Hashable, Awaitable
+
+
+class TTLCache(object):
+    """
+    In-process LRU cache where every entry also expires after a time to live. Values are copied going in and out so
+    callers can freely mutate what they get back without touching the cached copy.
+    """
+
+    def __init__(self, name: str, maxsize: int, ttl: float):
+        self.name = name
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.loading = dict()
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __contains__(self, key: Hashable):
+        return key in self.entries and self.entries[key][0] > monotonic()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        entry = self.entries.get(key)
+
+        if entry is None or entry[0] <= monotonic():
+            if entry is not None:
+                del self.entries[key]
+            self.misses += 1
+            return default
+
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return copy.copy(entry[1])
+
+    async def get_or_load(self, key: Hashable, loader: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Read-through get. Concurrent misses for the same key share a single call to the loader
+
+        :param key: Cache key
+        :param loader: Coroutine function returning the value to cache. None results are not cached
+        :return: Copy of the cached or loaded value
+        """
+        if (value := self.get(key)) is not None:
+            return value
+
+        if (future := self.loading.get(key)) is None:
+            future = asyncio.ensure_future(self._load(key, loader))
+            future.add_done_callback(lambda _: self.loading.pop(key, None))
+            self.loading[key] = future
+
+        return copy.copy(await asyncio.shield(future))
+
+    async def _load(self, key: Hashable, loader: Callable[[], Awaitable[Any]]) -> Any:
+        value = await loader()
+        if value is not None:
+            self.set(key, value)
+        return value
+
+    def set(self, key: Hashable, value: Any):
+        self.entries[key] = (monotonic() + self.ttl, copy.copy(value))
+        self.entries.move_to_end(key)
+
+        while len(self.entries) > self.maxsize:
+            self.entries.popitem(last=False)
+
+    def invalidate(self, key: Hashable):
+        self.entries.pop(key, None)
+
+    def invalidate_where(self, predicate: Callable[[Hashable], bool]):
+        for key in [k for k in self.entries if predicate(k)]:
+            del self.entries[key]
+
+    def clear(self):
+        self.entries.clear()
+
+    def stats(self) -> str:
+        total = self.hits + self.misses
+        ratio = self.hits / total if total > 0 else 0
+        return f"{self.name}: {len(self.entries)}/{self.maxsize} entries | {self.hits} hits | " \
+               f"{self.misses} misses | {ratio:.1%} hit rate"
+
+
+class LevelHistogram(object):
+    """
+    Count of a guild's active characters at each level. Built once from the characters table, then kept current by
+    recording each character's level as it is written, so reading it never touches the database.
+    """
+
+    def __init__(self, levels: dict[int, int]):
+        self.levels = dict()
+        self.counts = [0] * 21
+
+        for character_id, level in levels.items():
+            self.set(character_id, level)
+
+    def set(self, character_id: int, level: int | None):
+        """
+        Records a character's current level
+
+        :param character_id: Character id
+        :param level: Character level, or None if the character is no longer active
+        """
+        if (old_level := self.levels.pop(character_id, None)) is not None:
+            self.counts[old_level] -= 1
+
+        if level is not None:
+            self.levels[character_id] = level
+            self.counts[level] += 1
+
+    def rows(self) -> list[list[int]]:
+        return [[level, count] for level, count in enumerate(self.counts) if count > 0]
+
+
+class ShopRegistry(object):
+    """
+    Active shops for every guild that has been loaded, indexed by owner and channel and kept sorted by name. Guilds are
+    loaded from the shops table once, then kept current by write-through after every shop insert/update. Shops are
+    copied going out, like TTLCache.
+    """
+
+    def __init__(self):
+        self.guilds = dict()
+        self.owners = dict()
+        self.channels = dict()
+        self.sorted = dict()
+
+    def __contains__(self, guild_id: int):
+        return guild_id in self.guilds
+
+    def load(self, guild_id: int, shops: list):
+        for shop in self.guilds.pop(guild_id, dict()).values():
+            self._unindex(shop)
+
+        self.guilds[guild_id] = dict()
+        for shop in shops:
+            self.set(shop)
+
+    def set(self, shop):
+        """
+        Stores a written shop. Shops for guilds that aren't loaded are ignored, and inactive shops are dropped
+
+        :param shop: Shop that was written
+        """
+        if (shops := self.guilds.get(shop.guild_id)) is None:
+            return
+
+        if (old_shop := shops.pop(shop.id, None)) is not None:
+            self._unindex(old_shop)
+
+        if shop.active:
+            shop = copy.copy(shop)
+            shops[shop.id] = shop
+            self.owners[(shop.guild_id, shop.owner_id)] = shop
+            self.channels[shop.channel_id] = shop
+
+        self.sorted.pop(shop.guild_id, None)
+
+    def _unindex(self, shop):
+        self.owners.pop((shop.guild_id, shop.owner_id), None)
+        self.channels.pop(shop.channel_id, None)
+
+    def get_by_owner(self, guild_id: int, owner_id: int):
+        return copy.copy(self.owners.get((guild_id, owner_id)))
+
+    def get_by_channel(self, channel_id: int):
+        return copy.copy(self.channels.get(channel_id))
+
+    def get_all(self, guild_id: int) -> list:
+        if (shops := self.sorted.get(guild_id)) is None:
+            shops = self.sorted[guild_id] = sorted(self.guilds.get(guild_id, dict()).values(), key=lambda s: s.name)
+        return [copy.copy(s) for s in shops]
+
+    def get_by_type(self, guild_id: int) -> dict[str, list]:
+        shops = dict()
+        for shop in self.get_all(guild_id):
+            shops.setdefault(shop.type.value, []).append(shop)
+        return shops
+
+    def reset(self, guild_id: int):
+        """
+        Mirrors reset_guild_shops for a loaded guild
+
+        :param guild_id: guild_id
+        """
+        for shop in self.guilds.get(guild_id, dict()).values():
+            shop.seeks_remaining = 1 + shop.network
+            shop.inventory_rolled = False
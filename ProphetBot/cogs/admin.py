@@ -7,8 +7,10 @@ from discord import SlashCommandGroup, Option, ExtensionAlreadyLoaded, Extension
 from discord.ext import commands, tasks
 from os import listdir
 
+from ProphetBot.cache import TTLCache
 from ProphetBot.constants import ADMIN_GUILDS
 from ProphetBot.helpers import is_owner, is_admin, get_adventure
+from ProphetBot.scheduler import EditScheduler
 from ProphetBot.bot import BpBot
 
 log = logging.getLogger(__name__)
@@ -142,6 +144,20 @@ class Admin(commands.Cog):
                 files.append(file_name[:-3])
         await ctx.respond("\n".join(files))
 
+    @admin_commands.command(
+        name="cache",
+        description="Show cache and edit scheduler statistics"
+    )
+    @commands.check(is_owner)
+    async def cache_stats(self, ctx: ApplicationContext):
+        """
+        Shows hit/miss counts for all of the bot's caches, and flushed/suppressed counts for its edit schedulers
+
+        :param ctx: Context
+        """
+        caches = [c for c in vars(self.bot).values() if isinstance(c, (TTLCache, EditScheduler))]
+        await ctx.respond("\n".join([c.stats() for c in caches]), ephemeral=True)
+
     @commands.command("overwrites")
     @commands.check(is_owner)
     async def overwrites(self, ctx: ApplicationContext):
@@ -201,7 +217,7 @@ class Admin(commands.Cog):
     # --------------------------- #
 
     async def _reload_DB(self, ctx):
-        await self.bot.compendium.reload_categories(self.bot)
+        await self.bot.compendium.reload_categories(self.bot, True)
         await ctx.send("Compendium reloaded")
 
     async def _reload_items(self, ctx):
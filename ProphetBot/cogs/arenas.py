@@ -8,11 +8,11 @@ from discord.commands.context import ApplicationContext
 from discord.ext import commands
 
 from ProphetBot.bot import BpBot
-from ProphetBot.helpers import get_arena, get_character, add_player_to_arena, update_arena_tier, create_logs, \
+from ProphetBot.helpers import get_arena, get_character, add_player_to_arena, update_arena_tier, create_logs_bulk, \
     update_arena_status, end_arena, confirm
 from ProphetBot.models.db_objects import Arena, PlayerCharacter, Activity
 from ProphetBot.models.embeds import ArenaStatusEmbed, ArenaPhaseEmbed
-from ProphetBot.models.schemas import CharacterSchema
+from ProphetBot.models.schemas import CharacterSchema, row_mapper
 from ProphetBot.models.views.entity_view import ArenaView
 from ProphetBot.queries import insert_new_arena, get_multiple_characters, update_arena
 
@@ -203,16 +203,18 @@ class Arenas(commands.Cog):
                 await conn.execute(update_arena(arena))
                 async for row in await conn.execute(get_multiple_characters(players, ctx.guild_id)):
                     if row is not None:
-                        character: PlayerCharacter = CharacterSchema(ctx.bot.compendium).load(row)
+                        character: PlayerCharacter = row_mapper(CharacterSchema, ctx.bot.compendium).load(row)
                         chars.append(character)
 
             # Rewards:
-            await create_logs(ctx, host_char, host_act, host_act.value)
+            entries = [(host_char, host_act, host_act.value, 0, 0)]
             for c in chars:
-                await create_logs(ctx, c, arena_act, result)
+                entries.append((c, arena_act, result, 0, 0))
 
                 if arena.completed_phases - 1 >= (arena.tier.max_phases / 2) and result == "WIN":
-                    await create_logs(ctx, c, bonus_act, bonus_act.value)
+                    entries.append((c, bonus_act, bonus_act.value, 0, 0))
+
+            await create_logs_bulk(ctx, entries)
 
             embed = ArenaPhaseEmbed(ctx, arena, result)
 
@@ -9,11 +9,11 @@ from ProphetBot.bot import BpBot
 from ProphetBot.constants import SECRETS
 from ProphetBot.helpers import remove_fledgling_role, get_character_quests, get_character, get_player_character_class, \
     create_logs, get_faction_roles, get_level_cap, get_or_create_guild, confirm, is_admin, get_active_character_from_char_id, \
-    get_all_player_characters, get_character_from_char_id
+    get_all_player_characters, get_character_from_char_id, cache_character
 from ProphetBot.helpers.autocomplete_helpers import *
 from ProphetBot.models.db_objects import PlayerCharacter, PlayerCharacterClass, DBLog, Faction, LevelCaps, PlayerGuild
 from ProphetBot.models.embeds import ErrorEmbed, NewCharacterEmbed, CharacterGetEmbed, PlayerCharactersEmbed
-from ProphetBot.models.schemas import CharacterSchema
+from ProphetBot.models.schemas import CharacterSchema, row_mapper
 from ProphetBot.queries import insert_new_character, insert_new_class, update_character, update_class
 
 log = logging.getLogger(__name__)
@@ -100,7 +100,8 @@ class Character(commands.Cog):
                 description=f"Something went wrong creating the character."),
                 ephemeral=True)
 
-        character: PlayerCharacter = CharacterSchema(ctx.bot.compendium).load(row)
+        character: PlayerCharacter = row_mapper(CharacterSchema, ctx.bot.compendium).load(row)
+        cache_character(ctx.bot, character)
 
         player_class = PlayerCharacterClass(character_id=character.id, primary_class=c_class,
                                             subclass=c_subclass, active=True)
@@ -136,7 +137,7 @@ class Character(commands.Cog):
             player = ctx.author
 
         character: PlayerCharacter = await get_character(ctx.bot, player.id, ctx.guild_id)
-        g: PlayerGuild = await get_or_create_guild(ctx.bot.db, ctx.guild_id)
+        g: PlayerGuild = await get_or_create_guild(ctx.bot, ctx.guild_id)
 
         if character is None:
             return await ctx.respond(embed=ErrorEmbed(
@@ -251,6 +252,8 @@ class Character(commands.Cog):
         async with ctx.bot.db.acquire() as conn:
             await conn.execute(update_character(character))
 
+        cache_character(ctx.bot, character)
+
         embed = Embed(title="Update successful!",
                       description=f"{character.name}'s race/subrace updated to {character.get_formatted_race()}",
                       color=Color.random())
@@ -455,6 +458,7 @@ class Character(commands.Cog):
         async with ctx.bot.db.acquire() as conn:
             await conn.execute(update_character(character))
 
+        cache_character(ctx.bot, character)
         await ctx.respond(f"Character inactivated")
 
     @character_admin_commands.command(
@@ -487,7 +491,7 @@ class Character(commands.Cog):
         await ctx.defer()
 
         character: PlayerCharacter = await get_character(ctx.bot, player.id, ctx.guild_id)
-        g: PlayerGuild = await get_or_create_guild(ctx.bot.db, ctx.guild_id)
+        g: PlayerGuild = await get_or_create_guild(ctx.bot, ctx.guild_id)
 
         if character is None:
             return await ctx.respond(
@@ -543,13 +547,16 @@ class Character(commands.Cog):
             results = await conn.execute(insert_new_character(new_character))
             row = await results.first()
 
+        cache_character(ctx.bot, character)
+
         if row is None:
             log.error(f"CHARACTERS: Error writing character to DB for {ctx.guild.name} [ {ctx.guild_id} ]")
             return await ctx.respond(embed=ErrorEmbed(
                 description=f"Something went wrong creating the character."),
                 ephemeral=True)
 
-        new_character: PlayerCharacter = CharacterSchema(ctx.bot.compendium).load(row)
+        new_character: PlayerCharacter = row_mapper(CharacterSchema, ctx.bot.compendium).load(row)
+        cache_character(ctx.bot, new_character)
 
         # Character Class
         new_class = PlayerCharacterClass(character_id=new_character.id, primary_class=c_class,
@@ -676,6 +683,10 @@ class Character(commands.Cog):
 
             await conn.execute(update_character(re_char))
 
+        if act_char:
+            cache_character(ctx.bot, act_char)
+        cache_character(ctx.bot, re_char)
+
         return await ctx.respond(f"{re_char.name} is now the active character for {player.mention}")
 
     @faction_commands.command(
@@ -726,6 +737,7 @@ class Character(commands.Cog):
         async with ctx.bot.db.acquire() as conn:
             await conn.execute(update_character(character))
 
+        cache_character(ctx.bot, character)
         await remove_fledgling_role(ctx, player, "Faction Updated")
 
         embed = Embed(title="Success!",
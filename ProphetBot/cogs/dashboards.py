@@ -1,104 +1,230 @@
+import asyncio
 import calendar
+from collections import defaultdict
 from datetime import datetime, timezone
 import logging
 import io
 
 import discord.utils
-from PIL import Image, ImageDraw, ImageFilter
 from discord import SlashCommandGroup, ApplicationContext, TextChannel, Option, Message
 from discord.ext import commands, tasks
 
 from ProphetBot.bot import BpBot
-from ProphetBot.constants import DASHBOARD_REFRESH_INTERVAL
+from ProphetBot.constants import DASHBOARD_REFRESH_INTERVAL, DASHBOARD_CONCURRENCY, DASHBOARD_GUILD_LIMIT
 from ProphetBot.helpers import get_dashboard_from_category_channel_id, get_last_message, get_or_create_guild, \
-    get_guild_character_summary_stats, draw_progress_bar
-from ProphetBot.models.db_objects import RefCategoryDashboard, DashboardType, Shop, PlayerGuild
+    get_guild_character_summary_stats, render_progress_bar, load_dashboards, cache_dashboard, uncache_dashboard, \
+    get_level_histogram, load_guild_shops, load_channel_last_messages, summarize_message
+from ProphetBot.models.db_objects import RefCategoryDashboard, DashboardType, Shop, PlayerGuild, \
+    RefChannelLastMessage
 from ProphetBot.models.embeds import ErrorEmbed, RpDashboardEmbed, ShopDashboardEmbed, \
     GuildProgress
-from ProphetBot.models.schemas import RefCategoryDashboardSchema, ShopSchema
-from ProphetBot.queries import insert_new_dashboard, get_dashboards, delete_dashboard, update_dashboard, get_shops
+from ProphetBot.queries import insert_new_dashboard, delete_dashboard, update_dashboard, \
+    upsert_channel_last_messages, delete_channel_last_messages
 from timeit import default_timer as timer
 from texttable import Texttable
 
-from ProphetBot.queries.view_queries import get_level_distribution_query
-
 log = logging.getLogger(__name__)
 
+# Edit priority for update_dashboard. It rebuilds everything a pending flush_rp_dashboard would send
+FULL_REFRESH = 1
+
 
 def setup(bot: commands.Bot):
     bot.add_cog(Dashboards(bot))
 
 
+def get_rp_channels(rp_state: dict[int, str]) -> dict[str, list[int]]:
+    channels_dict = {
+        "Magewright": [],
+        "Available": [],
+        "In Use": []
+    }
+
+    for channel_id, status in rp_state.items():
+        channels_dict[status].append(channel_id)
+
+    return channels_dict
+
+
 class Dashboards(commands.Cog):
     bot: BpBot
+    rp_states: dict[int, dict[int, str]]  # category_channel_id -> {channel_id: status}
+    rendered_posts: dict[int, tuple]  # category_channel_id -> (dashboard_post_id, what was last posted)
+    dirty_last_messages: set[int]  # channel ids with summaries not yet persisted
+    deleted_last_messages: set[int]  # channel ids with summaries to remove
+    reread_channels: set[int]  # channel ids whose last message was deleted, so last_message_id can't be trusted
+    expected_last_ids: dict[int, int]  # channel_id -> deleted message id the gateway still reports as last_message_id
     dashboard_commands = SlashCommandGroup("dashboard", "Dashboard commands")
 
     def __init__(self, bot):
         self.bot = bot
+        self.rp_states = dict()
+        self.rendered_posts = dict()
+        self.dirty_last_messages = set()
+        self.deleted_last_messages = set()
+        self.reread_channels = set()
+        self.expected_last_ids = dict()
         print(f'Cog \'Dashboards\' loaded')
 
     @commands.Cog.listener()
     async def on_items_loaded(self):
+        if not self.persist_last_messages.is_running():
+            await load_channel_last_messages(self.bot)
+            self.persist_last_messages.start()
+
         if not self.update_dashboards.is_running():
-            log.info(f"Reloading dashboards every {DASHBOARD_REFRESH_INTERVAL} minutes.")
+            log.info(f"Sweeping all dashboards every {DASHBOARD_REFRESH_INTERVAL} minutes.")
             await self.update_dashboards.start()
 
+    @commands.Cog.listener()
+    async def on_log_created(self, guild_id: int):
+        self.mark_dirty(guild_id, "GUILD")
+
+    @commands.Cog.listener()
+    async def on_character_leveled(self, guild_id: int):
+        self.mark_dirty(guild_id, "GUILD", "LDIST")
+
+    @commands.Cog.listener()
+    async def on_shop_updated(self, guild_id: int):
+        self.mark_dirty(guild_id, "SHOP")
+
+    def mark_dirty(self, guild_id: int, *dashboard_types: str):
+        """
+        Schedules a refresh for a guild's dashboards of the given types. Refreshes go through the dashboard edit
+        scheduler, so a burst of events becomes a single edit per dashboard
+
+        :param guild_id: guild_id the event happened in
+        :param dashboard_types: DashboardType values affected by the event
+        """
+        for dashboard in [d for d in self.bot.dashboard_cache.values() if d is not None]:
+            dType: DashboardType = self.bot.compendium.get_object("c_dashboard_type", dashboard.dashboard_type)
+            category = dashboard.get_category_channel(self.bot)
+
+            if dType is not None and dType.value.upper() in dashboard_types \
+                    and category is not None and category.guild.id == guild_id:
+                self.bot.dashboard_edits.schedule(dashboard.category_channel_id,
+                                                  lambda d=dashboard: self.update_dashboard(d),
+                                                  priority=FULL_REFRESH)
+
+    @commands.Cog.listener()
+    async def on_raw_message_delete(self, payload: discord.RawMessageDeleteEvent):
+        if (summary := self.bot.last_messages.get(payload.channel_id)) is None \
+                or summary.message_id != payload.message_id:
+            return
+
+        # The message before this one is unknown, so drop the summary and let the dashboard re-read the channel
+        self.bot.last_messages.pop(payload.channel_id)
+        self.dirty_last_messages.discard(payload.channel_id)
+        self.deleted_last_messages.add(payload.channel_id)
+        self.reread_channels.add(payload.channel_id)
+
+        if dashboard := self.bot.dashboard_cache.get(summary.category_channel_id):
+            self.bot.dashboard_edits.schedule(dashboard.category_channel_id,
+                                              lambda: self.update_dashboard(dashboard), priority=FULL_REFRESH)
+
+    @commands.Cog.listener()
+    async def on_guild_channel_create(self, channel: discord.abc.GuildChannel):
+        await self.refresh_category(channel.category_id)
+
+    @commands.Cog.listener()
+    async def on_guild_channel_delete(self, channel: discord.abc.GuildChannel):
+        if self.bot.last_messages.pop(channel.id, None) is not None:
+            self.dirty_last_messages.discard(channel.id)
+            self.deleted_last_messages.add(channel.id)
+
+        await self.refresh_category(channel.category_id)
+
+    @commands.Cog.listener()
+    async def on_guild_channel_update(self, before: discord.abc.GuildChannel, after: discord.abc.GuildChannel):
+        if before.category_id != after.category_id:
+            await self.refresh_category(before.category_id)
+            await self.refresh_category(after.category_id)
+
+    async def refresh_category(self, category_channel_id: int | None):
+        """
+        Schedules a refresh for a category's RP dashboard after its set of channels changed
+
+        :param category_channel_id: CategoryChannel id, or None for channels outside a category
+        """
+        dashboard = await get_dashboard_from_category_channel_id(self.bot, category_channel_id)
+        dType: DashboardType = self.bot.compendium.get_object("c_dashboard_type", dashboard.dashboard_type) \
+            if dashboard is not None else None
+
+        if dType is not None and dType.value.upper() == "RP":
+            self.bot.dashboard_edits.schedule(category_channel_id, lambda: self.update_dashboard(dashboard),
+                                              priority=FULL_REFRESH)
+
+    def record_last_message(self, summary: RefChannelLastMessage):
+        self.bot.last_messages[summary.channel_id] = summary
+        self.dirty_last_messages.add(summary.channel_id)
+        self.deleted_last_messages.discard(summary.channel_id)
+        self.reread_channels.discard(summary.channel_id)
+        self.expected_last_ids.pop(summary.channel_id, None)
+
     @commands.Cog.listener()
     async def on_message(self, message):
         # Have to check for Category ID because ephemeral messages don't have them.
         if hasattr(message.channel, "category_id") and (cat_channel := message.channel.category_id):
-            async with self.bot.db.acquire() as conn:
-                dashboard: RefCategoryDashboard = await get_dashboard_from_category_channel_id(cat_channel, self.bot.db)
+            dashboard: RefCategoryDashboard = await get_dashboard_from_category_channel_id(self.bot, cat_channel)
 
             if not dashboard or message.channel.id in dashboard.excluded_channel_ids:
                 return
 
-            dashboard_message = await dashboard.get_pinned_post(self.bot)
-
-            if dashboard_message is None or not dashboard_message.pinned:
-                async with self.bot.db.acquire() as conn:
-                    return await conn.execute(delete_dashboard(dashboard))
-
             dType: DashboardType = self.bot.compendium.get_object("c_dashboard_type", dashboard.dashboard_type)
-            g: discord.Guild = dashboard.get_category_channel(self.bot).guild
 
-            if dType is None:
+            if dType is None or dType.value.upper() != "RP":
                 return
-            elif dType.value.upper() == "RP":
-                channels_dict = {
-                    "Magewright": [y.replace('\u200b', '').replace('<#','').replace('>','') for y in [x.value if "Magewright" in x.name else "" for x in dashboard_message.embeds[0].fields][0].split('\n')],
-                    "Available": [y.replace('\u200b', '').replace('<#','').replace('>','') for y in [x.value for x in dashboard_message.embeds[0].fields if "Available" in x.name][0].split('\n')],
-                    "In Use": [y.replace('\u200b', '').replace('<#','').replace('>','') for y in [x.value for x in dashboard_message.embeds[0].fields if "Unavailable" in x.name][0].split('\n')]
-                }
 
-                channel_id = str(message.channel.id)
-                if not message.content or message.content in ["```\n​\n```", "```\n \n```"]:
-                    if channel_id in channels_dict["Available"]:
-                        return
+            g: discord.Guild = message.channel.guild
+            self.track_last_message(dashboard, summarize_message(message.channel, message,
+                                                                 discord.utils.get(g.roles, name="Magewright")))
+        return
 
-                    channels_dict["Magewright"].remove(channel_id) if channel_id in channels_dict["Magewright"] else None
-                    channels_dict["In Use"].remove(channel_id) if channel_id in channels_dict["In Use"] else None
-                    channels_dict["Available"].append(channel_id)
+    @commands.Cog.listener()
+    async def on_raw_message_edit(self, payload: discord.RawMessageUpdateEvent):
+        # Embed unfurls also come through as edits, but only a content change can change the channel's status
+        if (summary := self.bot.last_messages.get(payload.channel_id)) is None \
+                or summary.message_id != payload.message_id or "content" not in payload.data:
+            return
+
+        if (dashboard := self.bot.dashboard_cache.get(summary.category_channel_id)) is None \
+                or (channel := self.bot.get_channel(payload.channel_id)) is None:
+            return
+
+        try:
+            message = await channel.fetch_message(payload.message_id)
+        except discord.errors.HTTPException as e:
+            log.error(f"DASHBOARD: Error re-reading edited message in {channel.name}: {e}")
+            return
+
+        self.track_last_message(dashboard, summarize_message(channel, message,
+                                                             discord.utils.get(channel.guild.roles,
+                                                                               name="Magewright")))
+
+    def track_last_message(self, dashboard: RefCategoryDashboard, summary: RefChannelLastMessage):
+        """
+        Records a channel's new latest message and schedules the RP dashboard edit it calls for, if any
 
-                    return await dashboard_message.edit(content='', embed=RpDashboardEmbed(channels_dict, message.channel.category.name))
+        :param dashboard: RP RefCategoryDashboard for the channel's category
+        :param summary: RefChannelLastMessage for the channel's latest message
+        """
+        self.record_last_message(summary)
 
-                elif (magewright_role := discord.utils.get(g.roles, name="Magewright")) and magewright_role.mention in message.content:
-                    if channel_id in channels_dict["Magewright"]:
-                        return
+        if (rp_state := self.rp_states.get(dashboard.category_channel_id)) is None:
+            # Not seeded yet. Let the scheduler coalesce a burst of messages into one full refresh
+            self.bot.dashboard_edits.schedule(dashboard.category_channel_id,
+                                              lambda: self.update_dashboard(dashboard), priority=FULL_REFRESH)
+            return
 
-                    channels_dict["Magewright"].append(channel_id)
-                    channels_dict["In Use"].remove(channel_id) if channel_id in channels_dict["In Use"] else None
-                    channels_dict["Available"].remove(channel_id) if channel_id in channels_dict["Available"] else None
+        status = summary.get_rp_status()
 
-                    return await dashboard_message.edit(content='', embed=RpDashboardEmbed(channels_dict, message.channel.category.name))
+        if rp_state.get(summary.channel_id) == status:
+            return
 
-                elif channel_id not in channels_dict["In Use"]:
-                    channels_dict["Magewright"].remove(channel_id) if channel_id in channels_dict["Magewright"] else None
-                    channels_dict["In Use"].append(channel_id)
-                    channels_dict["Available"].remove(channel_id) if channel_id in channels_dict["Available"] else None
+        rp_state.pop(summary.channel_id, None)
+        rp_state[summary.channel_id] = status
 
-                    return await dashboard_message.edit(content='', embed=RpDashboardEmbed(channels_dict, message.channel.category.name))
-        return
+        self.bot.dashboard_edits.schedule(dashboard.category_channel_id, lambda: self.flush_rp_dashboard(dashboard))
 
     @dashboard_commands.command(
         name="rp_create",
@@ -128,8 +254,8 @@ class Dashboards(commands.Cog):
 
         await ctx.defer()
 
-        dashboard: RefCategoryDashboard = await get_dashboard_from_category_channel_id(ctx.channel.category_id,
-                                                                                       ctx.bot.db)
+        dashboard: RefCategoryDashboard = await get_dashboard_from_category_channel_id(ctx.bot,
+                                                                                       ctx.channel.category_id)
 
         if dashboard is not None:
             return await ctx.respond(embed=ErrorEmbed(description="There is already a dashboard for this category. "
@@ -157,6 +283,7 @@ class Dashboards(commands.Cog):
         async with ctx.bot.db.acquire() as conn:
             await conn.execute(insert_new_dashboard(dashboard))
 
+        cache_dashboard(ctx.bot, dashboard)
         await self.update_dashboard(dashboard)
 
     @dashboard_commands.command(
@@ -166,7 +293,7 @@ class Dashboards(commands.Cog):
     async def dashboard_shop_create(self, ctx: ApplicationContext):
         await ctx.defer()
 
-        dashboard: RefCategoryDashboard = await get_dashboard_from_category_channel_id(ctx.channel_id, ctx.bot.db)
+        dashboard: RefCategoryDashboard = await get_dashboard_from_category_channel_id(ctx.bot, ctx.channel_id)
 
         if dashboard is not None:
             return await ctx.respond(embed=ErrorEmbed(description="There is already a dashboard for this category. "
@@ -189,6 +316,7 @@ class Dashboards(commands.Cog):
         async with ctx.bot.db.acquire() as conn:
             await conn.execute(insert_new_dashboard(dashboard))
 
+        cache_dashboard(ctx.bot, dashboard)
         await self.update_dashboard(dashboard)
 
     @dashboard_commands.command(
@@ -198,7 +326,7 @@ class Dashboards(commands.Cog):
     async def dashboard_guild_create(self, ctx: ApplicationContext):
         await ctx.defer()
 
-        dashboard: RefCategoryDashboard = await get_dashboard_from_category_channel_id(ctx.channel_id, ctx.bot.db)
+        dashboard: RefCategoryDashboard = await get_dashboard_from_category_channel_id(ctx.bot, ctx.channel_id)
 
         if dashboard is not None:
             return await ctx.respond(embed=ErrorEmbed(description="There is already a dashboard for this category. "
@@ -221,6 +349,7 @@ class Dashboards(commands.Cog):
         async with ctx.bot.db.acquire() as conn:
             await conn.execute(insert_new_dashboard(dashboard))
 
+        cache_dashboard(ctx.bot, dashboard)
         await self.update_dashboard(dashboard)
 
     @dashboard_commands.command(
@@ -230,7 +359,7 @@ class Dashboards(commands.Cog):
     async def dashboard_guild_create(self, ctx: ApplicationContext):
         await ctx.defer()
 
-        dashboard: RefCategoryDashboard = await get_dashboard_from_category_channel_id(ctx.channel_id, ctx.bot.db)
+        dashboard: RefCategoryDashboard = await get_dashboard_from_category_channel_id(ctx.bot, ctx.channel_id)
 
         if dashboard is not None:
             return await ctx.respond(embed=ErrorEmbed(description="There is already a dashboard for this category. "
@@ -253,6 +382,7 @@ class Dashboards(commands.Cog):
         async with ctx.bot.db.acquire() as conn:
             await conn.execute(insert_new_dashboard(dashboard))
 
+        cache_dashboard(ctx.bot, dashboard)
         await self.update_dashboard(dashboard)
 
     @dashboard_commands.command(
@@ -270,7 +400,7 @@ class Dashboards(commands.Cog):
         """
         await ctx.defer()
 
-        dashboard: RefCategoryDashboard = await get_dashboard_from_category_channel_id(ctx.channel_id, ctx.bot.db)
+        dashboard: RefCategoryDashboard = await get_dashboard_from_category_channel_id(ctx.bot, ctx.channel_id)
 
         if dashboard is None:
             return await ctx.respond(embed=ErrorEmbed(description=f"No dashboard found for this category"),
@@ -281,47 +411,104 @@ class Dashboards(commands.Cog):
         async with ctx.bot.db.acquire() as conn:
             await conn.execute(update_dashboard(dashboard))
 
+        cache_dashboard(ctx.bot, dashboard)
         await self.update_dashboard(dashboard)
         await ctx.respond(f"Exclusion added", ephemeral=True)
 
-    async def update_dashboard(self, dashboard: RefCategoryDashboard):
+    async def flush_rp_dashboard(self, dashboard: RefCategoryDashboard):
         """
-        Primary method to update a dashboard
+        Edits an RP dashboard's pinned post to show the category's current in-memory channel state
 
-        :param dashboard: RefCategoryDashboard to update
+        :param dashboard: RefCategoryDashboard to edit
+        """
+        if (rp_state := self.rp_states.get(dashboard.category_channel_id)) is None:
+            return
+
+        category = dashboard.get_category_channel(self.bot)
+        await self.edit_dashboard(dashboard, embed=RpDashboardEmbed(get_rp_channels(rp_state), category.name))
+
+    async def get_dashboard_post(self, dashboard: RefCategoryDashboard) -> Message | None:
         """
+        Fetches a dashboard's pinned post, deleting the dashboard if the post is gone or no longer pinned
 
+        :param dashboard: RefCategoryDashboard
+        :return: Pinned Message, or None if the dashboard was deleted
+        """
         original_message = await dashboard.get_pinned_post(self.bot)
 
         if original_message is None or not original_message.pinned:
+            self.rp_states.pop(dashboard.category_channel_id, None)
+            self.rendered_posts.pop(dashboard.category_channel_id, None)
+            uncache_dashboard(self.bot, dashboard)
             async with self.bot.db.acquire() as conn:
-                return await conn.execute(delete_dashboard(dashboard))
+                await conn.execute(delete_dashboard(dashboard))
+            return None
+
+        return original_message
+
+    async def edit_dashboard(self, dashboard: RefCategoryDashboard, content: str = '', embed: discord.Embed = None,
+                             rendered=None, verify: bool = False):
+        """
+        Edits a dashboard's pinned post, unless it already shows what was rendered
+
+        :param dashboard: RefCategoryDashboard to edit
+        :param content: Message content
+        :param embed: Message embed
+        :param rendered: What to compare against the last edit, if not the content and embed themselves
+        :param verify: Fetch the post even if nothing changed, to check it is still pinned
+        """
+        if rendered is None:
+            # Dashboard embeds are stamped with the render time, which shouldn't count as a change
+            rendered = (content, {k: v for k, v in embed.to_dict().items() if k != "timestamp"}
+                        if embed is not None else None)
+        unchanged = self.rendered_posts.get(dashboard.category_channel_id) == (dashboard.dashboard_post_id, rendered)
 
+        if unchanged and not verify:
+            return
+
+        if (original_message := await self.get_dashboard_post(dashboard)) is None or unchanged:
+            return
+
+        await original_message.edit(content=content, embed=embed)
+        self.rendered_posts[dashboard.category_channel_id] = (dashboard.dashboard_post_id, rendered)
+
+    async def update_dashboard(self, dashboard: RefCategoryDashboard, verify: bool = False):
+        """
+        Primary method to update a dashboard. The pinned post is only fetched and edited when the rendered dashboard
+        differs from the last one posted
+
+        :param dashboard: RefCategoryDashboard to update
+        :param verify: Fetch the pinned post even if nothing changed, to check it is still pinned
+        """
         dType: DashboardType = self.bot.compendium.get_object("c_dashboard_type", dashboard.dashboard_type)
         channels = dashboard.channels_to_check(self.bot)
 
         if dType is not None and dType.value.upper() == "RP":
-            channels_dict = {
-                "Magewright": [],
-                "Available": [],
-                "In Use": []
-            }
-
             g: discord.Guild = dashboard.get_category_channel(self.bot).guild
             magewright_role = discord.utils.get(g.roles, name="Magewright")
 
-            for c in channels:
-                last_message = await get_last_message(c)
+            # Persisted summaries are still current as long as the gateway agrees on the channel's last message
+            stale = [c for c in channels if (s := self.bot.last_messages.get(c.id)) is None
+                     or c.last_message_id not in (s.message_id, self.expected_last_ids.get(c.id))]
+            last_messages = await asyncio.gather(*[get_last_message(c, c.id in self.reread_channels) for c in stale])
+
+            # Build the state from these summaries rather than bot.last_messages, which a delete can change meanwhile
+            summaries = {c.id: self.bot.last_messages.get(c.id) for c in channels}
+            for c, m in zip(stale, last_messages):
+                summaries[c.id] = summarize_message(c, m, magewright_role)
+                self.record_last_message(summaries[c.id])
+
+                # A re-read after a delete finds an older message, so remember the id the gateway still reports
+                if summaries[c.id].message_id != c.last_message_id:
+                    self.expected_last_ids[c.id] = c.last_message_id
+
+            rp_state = {c_id: s.get_rp_status() for c_id, s in summaries.items() if s is not None}
 
-                if last_message is None or last_message.content in ["```\n​\n```", "```\n \n```"]:
-                    channels_dict["Available"].append(c.id)
-                elif magewright_role is not None and magewright_role.mention in last_message.content:
-                    channels_dict["Magewright"].append(c.id)
-                else:
-                    channels_dict["In Use"].append(c.id)
+            self.rp_states[dashboard.category_channel_id] = rp_state
 
             category = dashboard.get_category_channel(self.bot)
-            return await original_message.edit(content='', embed=RpDashboardEmbed(channels_dict, category.name))
+            return await self.edit_dashboard(dashboard, embed=RpDashboardEmbed(get_rp_channels(rp_state),
+                                                                               category.name), verify=verify)
 
         elif dType is not None and dType.value.upper() == "SHOP":
             shop_dict = {}
@@ -330,20 +517,15 @@ class Dashboards(commands.Cog):
             for shop_type in self.bot.compendium.c_shop_type[0].values():
                 shop_dict[shop_type.value] = []
 
-            async with self.bot.db.acquire() as conn:
-                async for row in conn.execute(get_shops(g.id)):
-                    if row is not None:
-                        shop: Shop = ShopSchema(self.bot.compendium).load(row)
-                        shop_dict[shop.type.value].append(shop)
-
-            for type in shop_dict:
-                shop_dict[type].sort(key=lambda x: x.name)
+            await load_guild_shops(self.bot, g.id)
+            shop_dict.update(self.bot.shop_registry.get_by_type(g.id))
 
-            return await original_message.edit(content='', embed=ShopDashboardEmbed(self.bot.compendium, g, shop_dict))
+            return await self.edit_dashboard(dashboard, embed=ShopDashboardEmbed(self.bot.compendium, g, shop_dict),
+                                             verify=verify)
 
         elif dType is not None and dType.value.upper() == "GUILD":
             dGuild: discord.Guild = dashboard.get_category_channel(self.bot).guild
-            g: PlayerGuild = await get_or_create_guild(self.bot.db, dGuild.id)
+            g: PlayerGuild = await get_or_create_guild(self.bot, dGuild.id)
             total, inactive = await get_guild_character_summary_stats(self.bot, dGuild.id)
 
             try:
@@ -351,33 +533,32 @@ class Dashboards(commands.Cog):
             except ZeroDivisionError:
                 return
 
-            # Start Drawing
-            width = 500
-            height = int(width * .15)
-            scale = .86
+            image = render_progress_bar(progress)
+            unchanged = self.rendered_posts.get(dashboard.category_channel_id) == (dashboard.dashboard_post_id, image)
+
+            if unchanged and not verify:
+                return
 
-            out = Image.new("RGBA", (width, height), (0, 0, 0, 0))
-            d = ImageDraw.Draw(out)
-            d = draw_progress_bar(d, 0, 0, int(width * scale), int(height * scale), progress)
-            sharp_out = out.filter(ImageFilter.SHARPEN)
+            if (original_message := await self.get_dashboard_post(dashboard)) is None \
+                    or (unchanged and original_message.attachments):
+                return
 
             embed = GuildProgress(dGuild.name)
 
-            with io.BytesIO() as output:
-                sharp_out.save(output, format="PNG")
-                output.seek(0)
+            with io.BytesIO(image) as output:
                 file = discord.File(fp=output, filename='image.png')
                 embed.set_image(url="attachment://image.png")
                 original_message.attachments.clear()
 
-                return await original_message.edit(file=file, embed=embed, content='')
-            
+                await original_message.edit(file=file, embed=embed, content='')
+
+            self.rendered_posts[dashboard.category_channel_id] = (dashboard.dashboard_post_id, image)
+            return
+
         elif dType is not None and dType.value.upper() == "LDIST":
-            data = []
-            async with self.bot.db.acquire() as conn:
-                async for row in conn.execute(get_level_distribution_query()):
-                    result = dict(row)
-                    data.append([result['Level'], result['#']])
+            dGuild: discord.Guild = dashboard.get_category_channel(self.bot).guild
+            histogram = await get_level_histogram(self.bot, dGuild.id)
+            data = histogram.rows()
 
             dist_table = Texttable()
             dist_table.set_cols_align(['l', 'r'])
@@ -388,7 +569,10 @@ class Dashboards(commands.Cog):
 
             footer = f"Last Updates - <t:{calendar.timegm(datetime.now(timezone.utc).timetuple())}:F>"
 
-            return await original_message.edit(content=f"```\n{dist_table.draw()}```{footer}", embed=None)
+            # The footer's timestamp changes every time, so only the table decides whether to edit
+            table = dist_table.draw()
+            return await self.edit_dashboard(dashboard, content=f"```\n{table}```{footer}", rendered=table,
+                                             verify=verify)
 
     # --------------------------- #
     # Tasks
@@ -396,9 +580,53 @@ class Dashboards(commands.Cog):
     @tasks.loop(minutes=DASHBOARD_REFRESH_INTERVAL)
     async def update_dashboards(self):
         start = timer()
-        async with self.bot.db.acquire() as conn:
-            async for row in conn.execute(get_dashboards()):
-                dashboard: RefCategoryDashboard = RefCategoryDashboardSchema().load(row)
-                await self.update_dashboard(dashboard)
+        dashboards = await load_dashboards(self.bot)
+        semaphore = asyncio.Semaphore(DASHBOARD_CONCURRENCY)
+        guild_limits = defaultdict(lambda: asyncio.Semaphore(DASHBOARD_GUILD_LIMIT))
+
+        await asyncio.gather(*[self.refresh_dashboard(d, semaphore, guild_limits) for d in dashboards])
         end = timer()
-        log.info(f"DASHBOARD: Channel status dashboards updated in [ {end - start:.2f} ]s")
+        log.info(f"DASHBOARD: {len(dashboards)} dashboards updated in [ {end - start:.2f} ]s")
+
+    async def refresh_dashboard(self, dashboard: RefCategoryDashboard, semaphore: asyncio.Semaphore,
+                                guild_limits: defaultdict):
+        """
+        Updates a single dashboard for the refresh task, waiting on both the guild's limit and the global one
+
+        :param dashboard: RefCategoryDashboard to update
+        :param semaphore: Semaphore bounding dashboards refreshed at once across all guilds
+        :param guild_limits: Semaphores bounding dashboards refreshed at once, keyed by guild id
+        """
+        category = dashboard.get_category_channel(self.bot)
+        guild_id = category.guild.id if category is not None else None
+
+        async with guild_limits[guild_id], semaphore:
+            start = timer()
+            try:
+                await self.update_dashboard(dashboard, verify=True)
+            except Exception as e:
+                log.error(f"DASHBOARD: Error updating dashboard for category {dashboard.category_channel_id}: {e}")
+            end = timer()
+
+        log.info(f"DASHBOARD: Dashboard for category {dashboard.category_channel_id} updated in [ {end - start:.2f} ]s")
+
+    @tasks.loop(minutes=1)
+    async def persist_last_messages(self):
+        dirty, self.dirty_last_messages = self.dirty_last_messages, set()
+        deleted, self.deleted_last_messages = self.deleted_last_messages, set()
+        summaries = [self.bot.last_messages[c] for c in dirty if c in self.bot.last_messages]
+
+        if len(summaries) == 0 and len(deleted) == 0:
+            return
+
+        try:
+            async with self.bot.db.acquire() as conn:
+                async with conn.begin():
+                    if len(summaries) > 0:
+                        await conn.execute(upsert_channel_last_messages(summaries))
+                    if len(deleted) > 0:
+                        await conn.execute(delete_channel_last_messages(list(deleted)))
+        except Exception as e:
+            log.error(f"DASHBOARD: Error persisting last messages, will retry: {e}")
+            self.dirty_last_messages |= dirty
+            self.deleted_last_messages |= deleted - self.dirty_last_messages
@@ -85,7 +85,7 @@ class Events(commands.Cog):
 
     @commands.Cog.listener()
     async def on_member_join(self, member: discord.Member):
-        g = await get_or_create_guild(self.bot.db, member.guild.id)
+        g = await get_or_create_guild(self.bot, member.guild.id)
 
         if (entrance_channel := discord.utils.get(member.guild.channels, name="entrance")) and g.greeting:
             message = g.greeting
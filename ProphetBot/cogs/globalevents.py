@@ -1,17 +1,27 @@
+import asyncio
+from collections import defaultdict
+from timeit import default_timer as timer
+
 from discord import *
-from discord.ext import commands
+from discord.ext import commands, tasks
 from ProphetBot.bot import BpBot
+from ProphetBot.constants import GLOBAL_SCRAPE_CONCURRENCY, GLOBAL_FLUSH_INTERVAL
 from ProphetBot.helpers import calc_amt, confirm, get_all_players, global_mod_autocomplete, get_global, get_player, \
-    get_character, create_logs, close_global, global_host_autocomplete
-from ProphetBot.models.db_objects import GlobalEvent, GlobalPlayer, PlayerCharacter
+    close_global, global_host_autocomplete, get_or_create_guild, build_log, cache_guild, cache_character, calc_rewards
+from ProphetBot.models.db_objects import GlobalEvent, GlobalPlayer, PlayerCharacter, PlayerGuild
 from ProphetBot.models.embeds import GlobalEmbed
 from discord.commands import SlashCommandGroup
-from ProphetBot.models.schemas import GlobalPlayerSchema
+from ProphetBot.models.schemas import GlobalPlayerSchema, CharacterSchema, row_mapper
 from ProphetBot.queries import insert_new_global_event, update_global_event, \
-    add_global_player, update_global_player
+    add_global_player, update_global_player, add_global_players, update_global_players, \
+    upsert_global_channels, get_active_globals, get_active_global, get_multiple_characters, insert_new_logs, \
+    update_character_balances, update_guild, delete_global_event, delete_global_players, delete_global_channels
 
 log = logging.getLogger(__name__)
 
+# Most messages read from one channel per history scan
+SCAN_LIMIT = 600
+
 
 def setup(bot):
     bot.add_cog(GlobalEvents(bot))
@@ -22,11 +32,44 @@ class GlobalEvents(commands.Cog):
     bot: BpBot  # Typing annotation for my IDE's sake
     global_event_commands = SlashCommandGroup("global_event", "Commands related to global event management.")
 
+    watched_channels: dict[int, int]  # channel_id -> guild_id for every channel of an active GlobalEvent
+    live_messages: dict[int, dict[int, list[tuple[int, int]]]]  # guild_id -> {channel_id: [(message_id, author_id)]}
+    save_locks: dict[int, asyncio.Lock]  # guild_id -> Lock serializing GlobalPlayer saves
+    caught_up: set[int]  # channel ids whose history has been read up to the channel head
+    catch_up_tasks: dict[int, asyncio.Task]  # channel_id -> running catch up for the channel
+    catch_up_limit: asyncio.Semaphore  # bounds channels read at once by catch ups
+
     def __init__(self, bot):
         self.bot = bot
+        self.watched_channels = dict()
+        self.live_messages = dict()
+        self.save_locks = defaultdict(asyncio.Lock)
+        self.caught_up = set()
+        self.catch_up_tasks = dict()
+        self.catch_up_limit = asyncio.Semaphore(GLOBAL_SCRAPE_CONCURRENCY)
 
         log.info(f'Cog \'Global\' loaded')
 
+    @commands.Cog.listener()
+    async def on_items_loaded(self):
+        if not self.flush_live_messages.is_running():
+            async with self.bot.db.acquire() as conn:
+                async for row in conn.execute(get_active_globals()):
+                    self.watched_channels.update({c: row["guild_id"] for c in row["channels"] or []})
+
+            self.flush_live_messages.start()
+
+            # Anything sent while the bot was down is still unread, so read it before live counts are saved
+            self.catch_up(dict(self.watched_channels))
+
+    @commands.Cog.listener()
+    async def on_message(self, message: Message):
+        if message.author.bot or (guild_id := self.watched_channels.get(message.channel.id)) is None:
+            return
+
+        self.live_messages.setdefault(guild_id, dict()).setdefault(message.channel.id, []) \
+            .append((message.id, message.author.id))
+
     @global_event_commands.command(
         name="new_event",
         description="Create a new global event",
@@ -118,29 +161,25 @@ class GlobalEvents(commands.Cog):
         if combat is not None:
             g_event.combat = combat
 
-        async with self.bot.db.acquire() as conn:
-            await conn.execute(update_global_event(g_event))
-
-        if gold or xp or mod or combat is not None:
+        async with self.save_locks[ctx.guild_id]:
             players = await get_all_players(ctx.bot, ctx.guild_id)
-            if players is not None:
-                for p in players:
-                    if p.active and p.update:
-                        bGold = g_event.base_gold if gold is None else gold
-                        bExp = g_event.base_xp if xp is None else xp
-
-                        if p.modifier == oldMod:
-                            bMod = g_event.base_mod if mod is None else mod
-                        else:
-                            bMod = p.modifier
+            to_update = []
 
-                        p.gold = calc_amt(ctx.bot.compendium, bGold, bMod, p.host)
-                        p.xp = calc_amt(ctx.bot.compendium, bExp, bMod, p.host)
+            if gold or xp or mod or combat is not None:
+                to_update = [p for p in players.values() if p.active and p.update]
+                for p in to_update:
+                    if p.modifier == oldMod:
+                        p.modifier = g_event.base_mod
 
-                        async with self.bot.db.acquire() as conn:
-                            await conn.execute(update_global_player(p))
+                calc_rewards(ctx.bot.compendium, g_event, to_update)
 
-        await ctx.respond(embed=GlobalEmbed(ctx, g_event, players))
+            async with self.bot.db.acquire() as conn:
+                async with conn.begin():
+                    await conn.execute(update_global_event(g_event))
+                    if len(to_update) > 0:
+                        await conn.execute(update_global_players(to_update))
+
+        await ctx.respond(embed=GlobalEmbed(ctx, g_event, list(players.values())))
 
     #
     @global_event_commands.command(
@@ -160,7 +199,9 @@ class GlobalEvents(commands.Cog):
         if g_event is None:
             return await ctx.respond(f'Error: No active global event on this server', ephemeral=True)
 
-        await close_global(ctx.bot.db, g_event.guild_id)
+        async with self.save_locks[ctx.guild_id]:
+            await close_global(ctx.bot.db, g_event.guild_id)
+            self.forget_event(g_event.guild_id)
 
         embed = Embed(title="Global purge")
         embed.set_footer(text="Sickness must be purged!")
@@ -180,6 +221,7 @@ class GlobalEvents(commands.Cog):
 
         :param ctx: Context
         :param channel: TextChannel to scrape
+        :param forum: ForumChannel whose threads are all scraped
         """
         await ctx.defer()
 
@@ -188,50 +230,209 @@ class GlobalEvents(commands.Cog):
         if g_event is None:
             return await ctx.respond(f'Error: No active global event on this server', ephemeral=True)
 
-        players = await get_all_players(ctx.bot, ctx.guild_id)
         if channel:
-            messages = await channel.history(oldest_first=True, limit=600).flatten()
-            await self.processMessages(g_event, channel.id, messages, players)
+            channels = [channel]
         elif forum:
-            for thread in forum.threads:
-                messages = await thread.history(oldest_first=True, limit=600).flatten()
-                await self.processMessages(g_event, thread.id, messages, players)
+            channels = forum.threads
+        else:
+            channels = []
+
+        start = timer()
+
+        # Buffer live messages from here on so nothing sent after the scan is missed
+        self.watched_channels.update({c.id: ctx.guild_id for c in channels})
+
+        semaphore = asyncio.Semaphore(GLOBAL_SCRAPE_CONCURRENCY)
+        scans = await asyncio.gather(*[self.scan_channel(c, g_event.last_message_ids.get(c.id), semaphore)
+                                       for c in channels])
+
+        g_event, players = await self.save_messages(ctx.guild_id, {c.id: msgs for c, msgs in zip(channels, scans)})
+
+        if g_event is None:
+            return await ctx.respond(f'Error: No active global event on this server', ephemeral=True)
+
+        self.caught_up.update([c.id for c, msgs in zip(channels, scans) if len(msgs) < SCAN_LIMIT])
+        behind = {c.id: ctx.guild_id for c, msgs in zip(channels, scans) if len(msgs) >= SCAN_LIMIT}
+        if behind:
+            self.caught_up.difference_update(behind.keys())
+            self.catch_up(behind)
+
+        end = timer()
+        log.info(f"GLOBAL: Scraped {len(channels)} channel(s) for {len(players)} player(s) in [ {end - start:.2f} ]s")
 
         await ctx.respond(embed=GlobalEmbed(ctx, g_event, list(players.values())))
 
-    async def processMessages(self,g_event: GlobalEvent, channel_id, messages: list[Message], players):
-        for msg in messages:
-            if not msg.author.bot:
-                if msg.author.id in players:
-                    player = players[msg.author.id]
-                    player.num_messages += 1
+    @staticmethod
+    async def scan_channel(channel: TextChannel | Thread, after: int | None,
+                           semaphore: asyncio.Semaphore) -> list[tuple[int, int | None]]:
+        """
+        Streams a channel's history after its watermark
+
+        :param channel: TextChannel or Thread to scan
+        :param after: Id of the last message already counted, or None to start from the beginning
+        :param semaphore: Semaphore capping how many channels are read at once
+        :return: List of (message id, author id) in the order sent. Bot messages have no author id so they only move
+            the watermark
+        """
+        messages = []
+
+        async with semaphore:
+            async for msg in channel.history(oldest_first=True, limit=SCAN_LIMIT,
+                                             after=Object(id=after) if after is not None else None):
+                messages.append((msg.id, None if msg.author.bot else msg.author.id))
+
+        return messages
+
+    async def save_messages(self, guild_id: int,
+                            messages: dict[int, list[tuple[int, int | None]]]) -> tuple[GlobalEvent | None, dict]:
+        """
+        Counts messages into a guild's GlobalPlayers and saves them, the event's channels and the channel watermarks
+        in one transaction. Messages at or before their channel's watermark were already counted and are skipped, so
+        scraped and live messages can overlap freely.
+
+        :param guild_id: guild_id of the GlobalEvent
+        :param messages: Dict of channel id to (message id, author id) pairs
+        :return: The GlobalEvent and its players by player id, or None and an empty dict if there is no active event
+        """
+        async with self.save_locks[guild_id]:
+            g_event: GlobalEvent = await get_global(self.bot, guild_id)
 
-                    if msg.channel.id not in player.channels:
-                        player.channels.append(msg.channel.id)
+            if g_event is None:
+                return None, dict()
 
-                else:
-                    player = GlobalPlayer(player_id=msg.author.id, guild_id=g_event.guild_id,
-                                          modifier=g_event.base_mod, host=None,
-                                          gold=calc_amt(self.bot.compendium, g_event.base_gold, g_event.base_mod),
-                                          xp=calc_amt(self.bot.compendium, g_event.base_xp, g_event.base_mod),
-                                          update=True, active=True, num_messages=1, channels=[msg.channel.id]
-                                          )
-                    async with self.bot.db.acquire() as conn:
-                        results = await conn.execute(add_global_player(player))
-                        row = await results.first()
+            players = await get_all_players(self.bot, guild_id)
+            new_players, changed_players, last_message_ids = dict(), dict(), dict()
 
-                    player = GlobalPlayerSchema(self.bot.compendium).load(row)
+            for channel_id, channel_messages in messages.items():
+                after = g_event.last_message_ids.get(channel_id)
 
-                players[player.player_id] = player
+                for message_id, player_id in channel_messages:
+                    if after is not None and message_id <= after:
+                        continue
+
+                    after = last_message_ids[channel_id] = g_event.last_message_ids[channel_id] = message_id
+                    if player_id is None:
+                        continue
+
+                    if player_id in players:
+                        player = players[player_id]
+                        changed_players[player_id] = player
+                    else:
+                        player = GlobalPlayer(guild_id=g_event.guild_id, player_id=player_id,
+                                              modifier=g_event.base_mod, host=None,
+                                              gold=calc_amt(self.bot.compendium, g_event.base_gold, g_event.base_mod),
+                                              xp=calc_amt(self.bot.compendium, g_event.base_xp, g_event.base_mod),
+                                              update=True, active=True, num_messages=0, channels=[])
+                        players[player_id] = new_players[player_id] = player
+
+                    player.num_messages += 1
+                    if channel_id not in player.channels:
+                        player.channels.append(channel_id)
+
+            new_channels = [c for c in messages.keys() if c not in g_event.channels]
+            g_event.channels.extend(new_channels)
 
-        if channel_id not in g_event.channels:
-            g_event.channels.append(channel_id)
             async with self.bot.db.acquire() as conn:
-                await conn.execute(update_global_event(g_event))
+                async with conn.begin():
+                    if new_players:
+                        results = await conn.execute(add_global_players(list(new_players.values())))
+                        async for row in results:
+                            player: GlobalPlayer = row_mapper(GlobalPlayerSchema, self.bot.compendium).load(row)
+                            players[player.player_id] = player
+                    if changed_players:
+                        await conn.execute(update_global_players(list(changed_players.values())))
+                    if new_channels:
+                        await conn.execute(update_global_event(g_event))
+                    if last_message_ids:
+                        await conn.execute(upsert_global_channels(g_event.guild_id, last_message_ids))
+
+            self.watched_channels.update({c: guild_id for c in g_event.channels})
+
+        return g_event, players
+
+    async def flush_guild(self, guild_id: int):
+        """
+        Saves the live messages tallied for a guild. On failure they are put back to be retried by the next flush
+
+        :param guild_id: guild_id to flush
+        """
+        tallied = self.live_messages.pop(guild_id, dict())
+
+        # Channels still behind on history keep their messages until a catch up reaches the channel head
+        messages = {c: m for c, m in tallied.items() if c in self.caught_up}
+        behind = {c: m for c, m in tallied.items() if c not in self.caught_up}
+        if behind:
+            self.live_messages.setdefault(guild_id, dict()).update(behind)
+
+        if not messages:
+            return
+
+        try:
+            await self.save_messages(guild_id, messages)
+        except Exception as e:
+            log.error(f"GLOBAL: Error saving live messages for guild {guild_id}, will retry: {e}")
+            pending = self.live_messages.setdefault(guild_id, dict())
+            for channel_id, channel_messages in messages.items():
+                pending[channel_id] = channel_messages + pending.get(channel_id, [])
+
+    def catch_up(self, channels: dict[int, int]):
+        """
+        Starts reading channels' history from their watermarks up to the channel head, a scan at a time, in the
+        background. Live messages for a channel are only saved once it has caught up, otherwise they would move the
+        watermark past unread history. Channels that are caught up or already being read are skipped
 
-                for p in players.keys():
-                    await conn.execute(update_global_player(players[p]))
+        :param channels: Dict of channel id to guild_id
+        """
+        for channel_id, guild_id in channels.items():
+            if channel_id in self.caught_up or channel_id in self.catch_up_tasks:
+                continue
+
+            self.catch_up_tasks[channel_id] = asyncio.ensure_future(
+                self.catch_up_channel(channel_id, guild_id, self.catch_up_limit))
+
+    async def catch_up_channel(self, channel_id: int, guild_id: int, semaphore: asyncio.Semaphore):
+        try:
+            channel = self.bot.get_channel(channel_id) or await self.bot.fetch_channel(channel_id)
+
+            while self.watched_channels.get(channel_id) == guild_id:
+                g_event: GlobalEvent = await get_global(self.bot, guild_id)
+                if g_event is None:
+                    return
+
+                messages = await self.scan_channel(channel, g_event.last_message_ids.get(channel_id), semaphore)
+                await self.save_messages(guild_id, {channel_id: messages})
+
+                if len(messages) < SCAN_LIMIT:
+                    self.caught_up.add(channel_id)
+                    return
+        except Exception as e:
+            log.error(f"GLOBAL: Error catching up channel {channel_id} for guild {guild_id}, will retry: {e}")
+        finally:
+            if self.catch_up_tasks.get(channel_id) is asyncio.current_task():
+                self.catch_up_tasks.pop(channel_id)
+
+    def forget_event(self, guild_id: int):
+        """
+        Stops watching a guild's channels once its GlobalEvent is closed
+
+        :param guild_id: guild_id of the closed GlobalEvent
+        """
+        channels = [c for c, g in self.watched_channels.items() if g == guild_id]
+
+        self.live_messages.pop(guild_id, None)
+        self.caught_up.difference_update(channels)
+        for channel_id in channels:
+            if (task := self.catch_up_tasks.pop(channel_id, None)) is not None:
+                task.cancel()
+        self.watched_channels = {c: g for c, g in self.watched_channels.items() if g != guild_id}
 
+    @tasks.loop(seconds=GLOBAL_FLUSH_INTERVAL)
+    async def flush_live_messages(self):
+        # Retry catch up for channels whose last attempt failed
+        self.catch_up({c: g for c, g in self.watched_channels.items() if c not in self.caught_up})
+
+        for guild_id in list(self.live_messages.keys()):
+            await self.flush_guild(guild_id)
 
     @global_event_commands.command(
         name="player_update",
@@ -268,41 +469,42 @@ class GlobalEvents(commands.Cog):
         if g_event is None:
             return await ctx.respond(f'Error: No active global event on this server', ephemeral=True)
 
-        g_player: GlobalPlayer = await get_player(ctx.bot, ctx.guild_id, player.id)
+        async with self.save_locks[ctx.guild_id]:
+            g_player: GlobalPlayer = await get_player(ctx.bot, ctx.guild_id, player.id)
 
-        if gold or xp is not None:
-            update = False
-        else:
-            update = True
+            if gold or xp is not None:
+                update = False
+            else:
+                update = True
 
-        if g_player is None:
-            bGold = g_event.base_gold if gold is None else gold
-            bExp = g_event.base_xp if xp is None else xp
-            bMod = g_event.base_mod if mod is None else ctx.bot.compendium.get_object("c_global_modifier", mod)
-            bHost = None if host is None else ctx.bot.compendium.get_object("c_host_status", host)
+            if g_player is None:
+                bGold = g_event.base_gold if gold is None else gold
+                bExp = g_event.base_xp if xp is None else xp
+                bMod = g_event.base_mod if mod is None else ctx.bot.compendium.get_object("c_global_modifier", mod)
+                bHost = None if host is None else ctx.bot.compendium.get_object("c_host_status", host)
 
-            g_player = GlobalPlayer(player_id=player.id, guild_id=g_event.guild_id, modifier=bMod, host=bHost,
-                                    gold=calc_amt(ctx.bot.compendium, bGold, bMod, bHost) if update else bGold,
-                                    xp=calc_amt(ctx.bot.compendium, bExp, bMod, bHost) if update else bGold,
-                                    update=update, active=True, num_messages=0, channels=[])
+                g_player = GlobalPlayer(player_id=player.id, guild_id=g_event.guild_id, modifier=bMod, host=bHost,
+                                        gold=calc_amt(ctx.bot.compendium, bGold, bMod, bHost) if update else bGold,
+                                        xp=calc_amt(ctx.bot.compendium, bExp, bMod, bHost) if update else bGold,
+                                        update=update, active=True, num_messages=0, channels=[])
 
-            async with self.bot.db.acquire() as conn:
-                await conn.execute(add_global_player(g_player))
-        else:
-            bGold = g_event.base_gold if gold is None else gold
-            bExp = g_event.base_xp if xp is None else xp
-            bMod = g_event.base_mod if mod is None else ctx.bot.compendium.get_object("c_global_modifier", mod)
-            bHost = None if host is None else ctx.bot.compendium.get_object("c_host_status", host)
-
-            g_player.gold = calc_amt(ctx.bot.compendium, bGold, bMod, bHost) if update else bGold
-            g_player.xp = calc_amt(ctx.bot.compendium, bExp, bMod, bHost) if update else bExp
-            g_player.modifier = bMod
-            g_player.host = bHost
-            g_player.update = update
-            g_player.active = True
+                async with self.bot.db.acquire() as conn:
+                    await conn.execute(add_global_player(g_player))
+            else:
+                bGold = g_event.base_gold if gold is None else gold
+                bExp = g_event.base_xp if xp is None else xp
+                bMod = g_event.base_mod if mod is None else ctx.bot.compendium.get_object("c_global_modifier", mod)
+                bHost = None if host is None else ctx.bot.compendium.get_object("c_host_status", host)
+
+                g_player.gold = calc_amt(ctx.bot.compendium, bGold, bMod, bHost) if update else bGold
+                g_player.xp = calc_amt(ctx.bot.compendium, bExp, bMod, bHost) if update else bExp
+                g_player.modifier = bMod
+                g_player.host = bHost
+                g_player.update = update
+                g_player.active = True
 
-            async with self.bot.db.acquire() as conn:
-                await conn.execute(update_global_player(g_player))
+                async with self.bot.db.acquire() as conn:
+                    await conn.execute(update_global_player(g_player))
 
         g_players = await get_all_players(ctx.bot, ctx.guild_id)
 
@@ -327,17 +529,18 @@ class GlobalEvents(commands.Cog):
         if g_event is None:
             return await ctx.respond(f'Error: No active global event on this server', ephemeral=True)
 
-        g_player: GlobalPlayer = await get_player(ctx.bot, ctx.guild_id, player.id)
+        async with self.save_locks[ctx.guild_id]:
+            g_player: GlobalPlayer = await get_player(ctx.bot, ctx.guild_id, player.id)
 
-        if g_player is None:
-            await ctx.respond(f'Player is not in the current global event', ephemeral=True)
+            if g_player is None:
+                return await ctx.respond(f'Player is not in the current global event', ephemeral=True)
 
-        if not g_player.active:
-            await ctx.respond(f'Player is already inactive for the global', ephemeral=True)
-        else:
-            g_player.active = False
-            async with self.bot.db.acquire() as conn:
-                await conn.execute(update_global_player(g_player))
+            if not g_player.active:
+                await ctx.respond(f'Player is already inactive for the global', ephemeral=True)
+            else:
+                g_player.active = False
+                async with self.bot.db.acquire() as conn:
+                    await conn.execute(update_global_player(g_player))
 
         players = await get_all_players(ctx.bot, ctx.guild_id)
 
@@ -356,6 +559,7 @@ class GlobalEvents(commands.Cog):
         :param gblist: Bool - List all active members
         """
         await ctx.defer()
+        await self.flush_guild(ctx.guild_id)
 
         g_event: GlobalEvent = await get_global(ctx.bot, ctx.guild_id)
 
@@ -389,21 +593,54 @@ class GlobalEvents(commands.Cog):
         elif not to_end:
             return await ctx.respond(f'Ok, cancelling.', delete_after=10)
 
-        players = await get_all_players(ctx.bot, ctx.guild_id)
+        await self.flush_guild(ctx.guild_id)
+        act = ctx.bot.compendium.get_object("c_activity", "GLOBAL")
+        g: PlayerGuild = await get_or_create_guild(ctx.bot, ctx.guild_id)
+        characters = dict()
         fail_players = []
         log_list = []
-        act = ctx.bot.compendium.get_object("c_activity", "GLOBAL")
 
-        for p in players:
-            player = players[p]
-            character: PlayerCharacter = await get_character(ctx.bot, player.player_id, g_event.guild_id)
-            if player.active:
-                if not character:
-                    fail_players.append(player)
-                else:
-                    log_list.append(await create_logs(ctx, character, act, g_event.name, player.gold, player.xp))
+        async with self.save_locks[ctx.guild_id]:
+            players = await get_all_players(ctx.bot, ctx.guild_id)
+            active_players = [p for p in players.values() if p.active]
+
+            async with self.bot.db.acquire() as conn:
+                async with conn.begin():
+                    # Lock the event so a second commit waits here and then finds it closed instead of paying twice
+                    results = await conn.execute(get_active_global(ctx.guild_id).with_for_update())
+                    if await results.first() is None:
+                        return await ctx.respond(f'Error: No active global event on this server', ephemeral=True)
+
+                    if len(active_players) > 0:
+                        query = get_multiple_characters([p.player_id for p in active_players], g.id).with_for_update()
+                        async for row in await conn.execute(query):
+                            if row is not None:
+                                character: PlayerCharacter = row_mapper(CharacterSchema, self.bot.compendium).load(row)
+                                characters[character.player_id] = character
+
+                    for player in active_players:
+                        if character := characters.get(player.player_id):
+                            log_list.append(build_log(self.bot.compendium, ctx.author.id, character, act, g,
+                                                      g_event.name, player.gold, player.xp))
+                        else:
+                            fail_players.append(player)
+
+                    if len(log_list) > 0:
+                        await conn.execute(insert_new_logs(log_list))
+                        await conn.execute(update_character_balances(list(characters.values())))
+                        await conn.execute(update_guild(g))
 
-        await close_global(ctx.bot.db, g_event.guild_id)
+                    # Close
+                    await conn.execute(delete_global_event(g.id))
+                    await conn.execute(delete_global_players(g.id))
+                    await conn.execute(delete_global_channels(g.id))
+
+        self.forget_event(g.id)
+        cache_guild(self.bot, g)
+        for character in characters.values():
+            cache_character(self.bot, character)
+        if len(log_list) > 0:
+            self.bot.dispatch("log_created", g.id)
 
         embed = Embed(title=f"Global: {g_event.name} - has been logged")
         embed.add_field(name="**# of Entries**",
@@ -428,29 +665,30 @@ class GlobalEvents(commands.Cog):
                         mod: Option(str, description="Modifier to adjust players to",
                                     autocomplete=global_mod_autocomplete)):
         await ctx.defer()
+        await self.flush_guild(ctx.guild_id)
 
         g_event: GlobalEvent = await get_global(ctx.bot, ctx.guild_id)
 
         if g_event is None:
             return await ctx.respond(f'Error: No active global event on this server', ephemeral=True)
 
-        players = await get_all_players(ctx.bot, ctx.guild_id)
         adj_mod = ctx.bot.compendium.get_object("c_global_modifier", mod)
 
-        for p in players.values():
-            if p.update and ((p.host is not None and p.host.value.upper() != "HOSTING ONLY") or p.host is None):
-                if operator == "Above":
-                    if p.num_messages >= threshold:
-                        p.modifier = adj_mod
-                elif operator == "Below":
-                    if p.num_messages <= threshold:
-                        p.modifier = adj_mod
+        async with self.save_locks[ctx.guild_id]:
+            players = await get_all_players(ctx.bot, ctx.guild_id)
+            to_update = [p for p in players.values()
+                         if p.update and (p.host is None or p.host.value.upper() != "HOSTING ONLY")]
+
+            for p in to_update:
+                if (operator == "Above" and p.num_messages >= threshold) or \
+                        (operator == "Below" and p.num_messages <= threshold):
+                    p.modifier = adj_mod
 
-                p.gold = calc_amt(ctx.bot.compendium, g_event.base_gold, p.modifier, p.host)
-                p.xp = calc_amt(ctx.bot.compendium, g_event.base_xp, p.modifier, p.host)
+            calc_rewards(ctx.bot.compendium, g_event, to_update)
 
+            if len(to_update) > 0:
                 async with self.bot.db.acquire() as conn:
-                    await conn.execute(update_global_player(p))
+                    await conn.execute(update_global_players(to_update))
 
         await ctx.respond(embed=GlobalEmbed(ctx, g_event, list(players.values())))
 
@@ -5,13 +5,14 @@ from discord import *
 from ProphetBot.bot import BpBot
 from discord.ext import commands, tasks
 from timeit import default_timer as timer
-from ProphetBot.helpers import get_or_create_guild, get_weekly_stipend, create_logs, \
-    get_guild_character_summary_stats, get_level_cap, get_character
+from ProphetBot.helpers import get_or_create_guild, get_weekly_stipend, build_log, \
+    get_guild_character_summary_stats, get_level_cap, invalidate_guild_characters, cache_guild, \
+    record_character_level, get_all_shops
 from ProphetBot.models.embeds import GuildEmbed, GuildStatus, GuildPace
-from ProphetBot.models.schemas import CharacterSchema, RefWeeklyStipendSchema, GuildSchema, ShopSchema
-from ProphetBot.queries import update_guild, get_characters, update_character, insert_weekly_stipend, \
-    update_weekly_stipend, delete_weekly_stipend, get_guild_weekly_stipends, get_multiple_characters, \
-    get_guilds_with_reset, get_shops, update_shop
+from ProphetBot.models.schemas import CharacterSchema, RefWeeklyStipendSchema, GuildSchema, row_mapper
+from ProphetBot.queries import update_guild, insert_weekly_stipend, update_weekly_stipend, delete_weekly_stipend, \
+    get_guild_weekly_stipends, get_multiple_characters, get_guilds_with_reset, reset_guild_shops, \
+    get_guild_weekly_totals, reset_weekly_diversion, insert_new_logs, update_character_balances
 from ProphetBot.models.db_objects import PlayerGuild, PlayerCharacter, RefWeeklyStipend, LevelCaps, Shop
 
 log = logging.getLogger(__name__)
@@ -50,12 +51,14 @@ class Guilds(commands.Cog):
 
         await ctx.defer()
 
-        g: PlayerGuild = await get_or_create_guild(ctx.bot.db, ctx.guild_id)
+        g: PlayerGuild = await get_or_create_guild(ctx.bot, ctx.guild_id)
 
         g.max_reroll = amount
         async with self.bot.db.acquire() as conn:
             await conn.execute(update_guild(g))
 
+        cache_guild(self.bot, g)
+
         await ctx.respond(embed=GuildEmbed(ctx, g))
 
     @guilds_commands.command(
@@ -73,12 +76,14 @@ class Guilds(commands.Cog):
 
         await ctx.defer()
 
-        g: PlayerGuild = await get_or_create_guild(ctx.bot.db, ctx.guild_id)
+        g: PlayerGuild = await get_or_create_guild(ctx.bot, ctx.guild_id)
 
         g.server_xp = amount
         async with self.bot.db.acquire() as conn:
             await conn.execute(update_guild(g))
 
+        cache_guild(self.bot, g)
+
         await ctx.respond(embed=GuildEmbed(ctx, g))
 
     @guilds_commands.command(
@@ -97,13 +102,15 @@ class Guilds(commands.Cog):
 
         await ctx.defer()
 
-        g: PlayerGuild = await get_or_create_guild(ctx.bot.db, ctx.guild_id)
+        g: PlayerGuild = await get_or_create_guild(ctx.bot, ctx.guild_id)
         g.max_level = amount
         g.week_xp = 0
         g.server_xp = 0
         async with self.bot.db.acquire() as conn:
             await conn.execute(update_guild(g))
 
+        cache_guild(self.bot, g)
+
         await ctx.respond(embed=GuildEmbed(ctx, g))
 
     @guilds_commands.command(
@@ -122,7 +129,7 @@ class Guilds(commands.Cog):
         """
         await ctx.defer()
 
-        g: PlayerGuild = await get_or_create_guild(ctx.bot.db, ctx.guild_id)
+        g: PlayerGuild = await get_or_create_guild(ctx.bot, ctx.guild_id)
 
         total, inactive = await get_guild_character_summary_stats(ctx.bot, ctx.guild_id)
 
@@ -212,7 +219,7 @@ class Guilds(commands.Cog):
         """
         await ctx.defer()
 
-        g: PlayerGuild = await get_or_create_guild(ctx.bot.db, ctx.guild_id)
+        g: PlayerGuild = await get_or_create_guild(ctx.bot, ctx.guild_id)
 
         if day_of_week == "None":
             day = None
@@ -243,6 +250,8 @@ class Guilds(commands.Cog):
         async with ctx.bot.db.acquire() as conn:
             await conn.execute(update_guild(g))
 
+        cache_guild(self.bot, g)
+
         await ctx.respond(embed=GuildEmbed(ctx, g))
 
     @guilds_commands.command(
@@ -253,13 +262,15 @@ class Guilds(commands.Cog):
                               adjustment: Option(int, description="XP Adjustment", required=True)):
         await ctx.defer()
 
-        g: PlayerGuild = await get_or_create_guild(ctx.bot.db, ctx.guild_id)
+        g: PlayerGuild = await get_or_create_guild(ctx.bot, ctx.guild_id)
 
         g.xp_adjust = adjustment
 
         async with ctx.bot.db.acquire() as conn:
             await conn.execute(update_guild(g))
 
+        cache_guild(self.bot, g)
+
         return await ctx.respond(embed=GuildEmbed(ctx, g))
 
     @guilds_commands.command(
@@ -273,7 +284,7 @@ class Guilds(commands.Cog):
                                         required=False)):
         await ctx.defer()
 
-        g: PlayerGuild = await get_or_create_guild(ctx.bot.db, ctx.guild_id)
+        g: PlayerGuild = await get_or_create_guild(ctx.bot, ctx.guild_id)
 
         total, inactive = await get_guild_character_summary_stats(ctx.bot, ctx.guild_id)
 
@@ -292,7 +303,7 @@ class Guilds(commands.Cog):
         """
         await ctx.defer()
 
-        g: PlayerGuild = await get_or_create_guild(ctx.bot.db, ctx.guild_id)
+        g: PlayerGuild = await get_or_create_guild(ctx.bot, ctx.guild_id)
 
         await self.perform_weekly_reset(g)
         await ctx.respond("Weekly reset manually completed")
@@ -305,11 +316,14 @@ class Guilds(commands.Cog):
         """
         # Setup
         start = timer()
+        guild = self.bot.get_guild(g.id)
         guild_xp = g.week_xp
-        player_xp = 0
-        player_gold = 0
         stipend_list = []
-        shopkeeper_stipend = ""
+        expired_stipends = []
+        payouts = []
+        log_list = []
+        characters = dict()
+        shopkeeper_stipend = None
 
         # Guild updates
         g.server_xp += g.week_xp
@@ -317,88 +331,97 @@ class Guilds(commands.Cog):
         g.weeks += 1
         g.last_reset = datetime.datetime.utcnow()
 
-        # Reset weekly stats
         async with self.bot.db.acquire() as conn:
-            async for row in await conn.execute(get_characters(g.id)):
-                if row is not None:
-                    character: PlayerCharacter = CharacterSchema(self.bot.compendium).load(row)
-                    player_xp += character.div_xp
-                    player_gold += character.div_gold
-                    character.div_xp = 0
-                    character.div_gold = 0
-                    await conn.execute(update_character(character))
-
-            log.info(
-                f"Weekly stats for {self.bot.get_guild(g.id).name} [ {g.id} ]: "
-                f"Weekly Server XP = {guild_xp} | Player XP = {player_xp} | "
-                f"Player gold = {player_gold}")
-
-            # Stipends
+            results = await conn.execute(get_guild_weekly_totals(g.id))
+            totals = await results.first()
+
             async for row in await conn.execute(get_guild_weekly_stipends(g.id)):
                 if row is not None:
-                    stipend: RefWeeklyStipend = RefWeeklyStipendSchema().load(row)
+                    stipend: RefWeeklyStipend = row_mapper(RefWeeklyStipendSchema).load(row)
                     stipend_list.append(stipend)
 
-        if len(stipend_list) > 0:
-            stipend_list.sort(key=lambda s: s.ratio, reverse=True)
-            act: Activity = self.bot.compendium.get_object("c_activity", "STIPEND")
-            s_players = []
-            for s in stipend_list:
-                if stipend_role := self.bot.get_guild(g.id).get_role(s.role_id):
-                    if s.leadership:
-                        players = list(filter(lambda s: s not in s_players, [p.id for p in stipend_role.members]))
-                    elif "shopkeeper" in stipend_role.name.lower() or "shopkeeper" in s.reason.lower():
-                        shopkeeper_stipend = s
-                        players = []
-                    else:
-                        players = [p.id for p in stipend_role.members]
-                    async with self.bot.db.acquire() as conn:
-                        async for row in await conn.execute(get_multiple_characters(players, g.id)):
-                            if row is not None:
-                                character: PlayerCharacter = CharacterSchema(self.bot.compendium).load(row)
-                                if s.leadership:
-                                    s_players.append(character.player_id)
-                                cap: LevelCaps = get_level_cap(character, g, self.bot.compendium)
-                                await create_logs(self, character, act,
-                                                  f"Stipend Role: {stipend_role.name} - {s.reason}",
-                                                  cap.max_gold * s.ratio,
-                                                  cap.max_xp * s.ratio)
+        shop_list = await get_all_shops(self.bot, g.id) or []
+
+        log.info(
+            f"Weekly stats for {guild.name} [ {g.id} ]: "
+            f"Weekly Server XP = {guild_xp} | Player XP = {totals['player_xp']} | "
+            f"Player gold = {totals['player_gold']}")
+
+        # Stipends
+        stipend_list.sort(key=lambda s: s.ratio, reverse=True)
+        s_players = []
+        for s in stipend_list:
+            if stipend_role := guild.get_role(s.role_id):
+                if s.leadership:
+                    players = list(filter(lambda p: p not in s_players, [p.id for p in stipend_role.members]))
+                    s_players += players
+                elif "shopkeeper" in stipend_role.name.lower() or "shopkeeper" in s.reason.lower():
+                    shopkeeper_stipend = s
+                    players = []
                 else:
-                    # Role doesn't exist....
-                    async with self.bot.db.acquire() as conn:
-                        await conn.execute(delete_weekly_stipend(s))
+                    players = [p.id for p in stipend_role.members]
 
-        # Shops
-        async with self.bot.db.acquire() as conn:
-            async for row in await conn.execute(get_shops(g.id)):
-                if row is not None:
-                    shop: Shop = ShopSchema(self.bot.compendium).load(row)
+                payouts += [(p, f"Stipend Role: {stipend_role.name} - {s.reason}", s.ratio) for p in players]
+            else:
+                # Role doesn't exist....
+                expired_stipends.append(s)
 
-                    if shopkeeper_stipend and shop.inventory_rolled:
-                        character: PlayerCharacter = await get_character(self.bot, shop.owner_id, g.id)
-                        cap: LevelCaps = get_level_cap(character, g, self.bot.compendium)
-                        await create_logs(self, character, act, f"Shopkeeper Stipend",
-                                          cap.max_gold * shopkeeper_stipend.ratio,
-                                          cap.max_xp * s.ratio)
+        if shopkeeper_stipend:
+            payouts += [(shop.owner_id, "Shopkeeper Stipend", shopkeeper_stipend.ratio)
+                        for shop in shop_list if shop.inventory_rolled]
 
-                    shop.seeks_remaining = 1 + shop.network
-                    shop.inventory_rolled = False
-                    await conn.execute(update_shop(shop))
+        act: Activity = self.bot.compendium.get_object("c_activity", "STIPEND")
 
-        # Guild
         async with self.bot.db.acquire() as conn:
-            await conn.execute(update_guild(g))
+            async with conn.begin():
+                # Reset weekly stats
+                await conn.execute(reset_weekly_diversion(g.id))
+
+                if len(payouts) > 0:
+                    player_ids = list(set([p[0] for p in payouts]))
+                    query = get_multiple_characters(player_ids, g.id).with_for_update()
+                    async for row in await conn.execute(query):
+                        if row is not None:
+                            character: PlayerCharacter = row_mapper(CharacterSchema, self.bot.compendium).load(row)
+                            characters[character.player_id] = character
+
+                    for player_id, notes, ratio in payouts:
+                        if character := characters.get(player_id):
+                            cap: LevelCaps = get_level_cap(character, g, self.bot.compendium)
+                            log_list.append(build_log(self.bot.compendium, self.bot.user.id, character, act, g, notes,
+                                                      cap.max_gold * ratio, cap.max_xp * ratio))
+
+                if len(log_list) > 0:
+                    await conn.execute(insert_new_logs(log_list))
+                    await conn.execute(update_character_balances(list(characters.values())))
+
+                for s in expired_stipends:
+                    await conn.execute(delete_weekly_stipend(s))
+
+                # Shops
+                await conn.execute(reset_guild_shops(g.id))
+
+                # Guild
+                await conn.execute(update_guild(g))
+
+        cache_guild(self.bot, g)
+        invalidate_guild_characters(self.bot, g.id)
+        self.bot.shop_registry.reset(g.id)
+
+        for character in characters.values():
+            record_character_level(self.bot, character)
+        self.bot.dispatch("log_created", g.id)
 
         end = timer()
 
         # Announce we're all done!
-        if announcement_channel := discord.utils.get(self.bot.get_guild(g.id).channels, name="announcements"):
+        if announcement_channel := discord.utils.get(guild.channels, name="announcements"):
             try:
                 await announcement_channel.send(content=f"Weekly reset complete in {end - start:.2f} seconds.")
             except Exception as error:
                 if isinstance(error, discord.errors.HTTPException):
                     log.error(f"WEEKLY RESET: Error sending message to announcements channel in "
-                              f"{self.bot.get_guild(g.id).name} [ {g.id} ]")
+                              f"{guild.name} [ {g.id} ]")
                 else:
                     log.error(error)
 
@@ -413,5 +436,5 @@ class Guilds(commands.Cog):
         async with self.bot.db.acquire() as conn:
             async for row in await conn.execute(get_guilds_with_reset(day, hour)):
                 if row is not None:
-                    g: PlayerGuild = GuildSchema().load(row)
+                    g: PlayerGuild = row_mapper(GuildSchema).load(row)
                     await self.perform_weekly_reset(g)
@@ -3,12 +3,13 @@ import logging
 from discord import SlashCommandGroup, Option, ApplicationContext, Member, Role, Embed, Color
 from discord.ext import commands
 
-from ProphetBot.helpers import get_character, create_logs, get_adventure_from_role, get_or_create_guild, get_level_cap, \
-    get_log, get_active_character_from_char_id, confirm, is_admin
+from ProphetBot.helpers import get_character, create_logs, create_logs_bulk, get_adventure_from_role, get_or_create_guild, \
+    get_level_cap, get_log, get_active_character_from_char_id, confirm, is_admin, cache_character, \
+    cache_guild
 from ProphetBot.bot import BpBot
 from ProphetBot.models.db_objects import PlayerCharacter, Activity, DBLog, Adventure, LevelCaps, PlayerGuild
 from ProphetBot.models.embeds import ErrorEmbed, HxLogEmbed, DBLogEmbed, AdventureEPEmbed
-from ProphetBot.models.schemas import LogSchema, CharacterSchema
+from ProphetBot.models.schemas import LogSchema, CharacterSchema, row_mapper
 from ProphetBot.queries import get_n_player_logs, get_multiple_characters, update_adventure, update_log, update_guild, \
     update_character, insert_new_log
 
@@ -56,7 +57,7 @@ class Log(commands.Cog):
         async with self.bot.db.acquire() as conn:
             async for row in conn.execute(get_n_player_logs(character.id, num_logs)):
                 if row is not None:
-                    log: DBLog = LogSchema(ctx.bot.compendium).load(row)
+                    log: DBLog = row_mapper(LogSchema, ctx.bot.compendium).load(row)
                     log_ary.append(log)
 
         await ctx.respond(embed=HxLogEmbed(log_ary, character, ctx), ephemeral=True)
@@ -145,18 +146,22 @@ class Log(commands.Cog):
 
         char_act: Activity = ctx.bot.compendium.get_object("c_activity", "ADVENTURE")
         dm_act: Activity = ctx.bot.compendium.get_object("c_activity", "ADVENTURE_DM")
-        g: PlayerGuild = await get_or_create_guild(ctx.bot.db, ctx.guild_id)
+        g: PlayerGuild = await get_or_create_guild(ctx.bot, ctx.guild_id)
+
+        entries = []
 
         async with ctx.bot.db.acquire() as conn:
             await conn.execute(update_adventure(adventure))
             async for row in await conn.execute(get_multiple_characters(players, ctx.guild.id)):
                 if row is not None:
-                    character: PlayerCharacter = CharacterSchema(ctx.bot.compendium).load(row)
+                    character: PlayerCharacter = row_mapper(CharacterSchema, ctx.bot.compendium).load(row)
                     cap: LevelCaps = get_level_cap(character, g, ctx.bot.compendium)
 
                     activity = char_act if character.player_id not in adventure.dms else dm_act
-                    await create_logs(ctx, character, activity, adventure.name, (cap.max_gold * activity.ratio) * ep,
-                                      (cap.max_xp * activity.ratio) * ep, adventure)
+                    entries.append((character, activity, adventure.name, (cap.max_gold * activity.ratio) * ep,
+                                    (cap.max_xp * activity.ratio) * ep))
+
+        await create_logs_bulk(ctx, entries, adventure)
 
         await ctx.respond(embed=AdventureEPEmbed(ctx, adventure, ep))
 
@@ -197,7 +202,7 @@ class Log(commands.Cog):
                 elif not conf:
                     return await ctx.respond(f'Ok, cancelling.', delete_after=10)
 
-                g: PlayerGuild = await get_or_create_guild(ctx.bot.db, ctx.guild_id)
+                g: PlayerGuild = await get_or_create_guild(ctx.bot, ctx.guild_id)
 
                 character.gold -= log_entry.gold
                 character.xp -= log_entry.xp
@@ -227,7 +232,10 @@ class Log(commands.Cog):
                     await conn.execute(update_guild(g))
                     await conn.execute(update_character(character))
 
-                result_log = LogSchema(ctx.bot.compendium).load(row)
+                cache_guild(ctx.bot, g)
+                cache_character(ctx.bot, character)
+                ctx.bot.dispatch("log_created", g.id)
+                result_log = row_mapper(LogSchema, ctx.bot.compendium).load(row)
 
                 await ctx.respond(embed=DBLogEmbed(ctx, result_log, character))
 
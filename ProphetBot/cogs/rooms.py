@@ -5,7 +5,7 @@ from discord import SlashCommandGroup, ApplicationContext, Option
 from discord.ext import commands
 
 from ProphetBot.bot import BpBot
-from ProphetBot.helpers import get_adventure, is_admin
+from ProphetBot.helpers import get_adventure, is_admin, reorder_channels
 from ProphetBot.models.db_objects import Adventure
 from ProphetBot.models.embeds import ErrorEmbed
 
@@ -197,8 +197,6 @@ class Room(commands.Cog):
                         new_position = len(channels) - 1
 
             channels.insert(new_position, channels.pop(old_position))
-
-            for i, c in enumerate(channels):
-                await c.edit(position=i)
+            await reorder_channels(ctx.bot, ctx.guild, channels, reason=f"Room moved by {ctx.author.name}")
 
             await ctx.respond(f"Channel {ctx.channel.mention} moved to position {new_position + 1} of {len(channels)}")
\ No newline at end of file
@@ -3,6 +3,7 @@ import random
 
 import d20
 import discord
+import numpy as np
 from discord import SlashCommandGroup, ApplicationContext, Member, Option, TextChannel, CategoryChannel
 from discord.ext import commands
 from texttable import Texttable
@@ -10,9 +11,10 @@ from texttable import Texttable
 from ProphetBot.bot import BpBot
 from ProphetBot.helpers import get_or_create_guild, sort_stock, \
     shop_create_type_autocomplete, get_shop, upgrade_autocomplete, roll_stock, paginate, rarity_autocomplete, confirm, \
-    item_autocomplete, get_all_shops
+    item_autocomplete, get_all_shops, roll_shop_stock, cache_shop, reorder_channels, roll_guild_stock
 from ProphetBot.models.db_objects import PlayerGuild, Shop
 from ProphetBot.models.embeds import ErrorEmbed, NewShopEmbed, ShopEmbed, ShopSeekEmbed
+from ProphetBot.models.schemas import ShopSchema, row_mapper
 from ProphetBot.queries import insert_new_shop, update_shop
 
 log = logging.getLogger(__name__)
@@ -47,7 +49,10 @@ class Shops(commands.Cog):
         async with ctx.bot.db.acquire() as conn:
             await conn.execute(update_shop(shop))
 
-        g: PlayerGuild = await get_or_create_guild(ctx.bot.db, ctx.guild_id)
+        cache_shop(ctx.bot, shop)
+
+        g: PlayerGuild = await get_or_create_guild(ctx.bot, ctx.guild_id)
+        stock = roll_shop_stock(ctx.bot.compendium, g, shop)
 
         if shop.type.id == 1:  # Consumable
             potion_table = Texttable()
@@ -56,38 +61,19 @@ class Shops(commands.Cog):
             potion_table.set_cols_width([20, 5, 7])
 
             potion_table.header(['Item', 'Qty', 'Cost'])
-            potion_qty = 3 + shop.shelf
-            potion_items = list(ctx.bot.compendium.consumable[0].values())
-
-            potion_stock = {'Potion of Healing': random.randint(1, 4)}
-            potion_stock.update(roll_stock(ctx.bot.compendium, g, potion_items, potion_qty, 4, shop.max_cost, 1))
 
-            potion_data = []
-            for p in potion_stock:
-                if p == 'Potion of Healing':
-                    potion_data.append([p, str(potion_stock[p]), '50'])
-                else:
-                    potion = ctx.bot.compendium.get_object("consumable", p)
-                    potion_data.append([potion.name, str(potion_stock[p]), str(potion.cost)])
+            potion_data = {'Potion of Healing': ['Potion of Healing', str(random.randint(1, 4)), '50']}
+            potion_data.update({p.name: [p.name, str(qty), str(p.cost)] for p, qty in stock["potion"]})
 
-            potion_table.add_rows(sort_stock(potion_data), header=False)
+            potion_table.add_rows(sort_stock(list(potion_data.values())), header=False)
 
             scroll_table = Texttable()
             scroll_table.set_cols_align(['l', 'c', 'l'])
             scroll_table.set_cols_valign(['m', 'm', 'm'])
             scroll_table.set_cols_width([20, 5, 7])
             scroll_table.header(['Item (lvl)', 'Qty', 'Cost'])
-            scroll_qty = 6 + (3 * shop.shelf)
-            scroll_items = list(ctx.bot.compendium.scroll[0].values())
-
-            scroll_stock = roll_stock(ctx.bot.compendium, g, scroll_items, scroll_qty, 2, shop.max_cost)
-
-            scroll_data = []
-            for s in scroll_stock:
-                scroll = ctx.bot.compendium.get_object("scroll", s)
-                scroll_data.append([scroll.display_name(), str(scroll_stock[s]), str(scroll.cost)])
-
-            scroll_table.add_rows(sort_stock(scroll_data), header=False)
+            scroll_table.add_rows([[s.display_name(), str(qty), str(s.cost)] for s, qty in stock["scroll"]],
+                                  header=False)
 
             await ctx.delete()
             await ctx.send(f'Rolling stock for {ctx.guild.get_channel(shop.channel_id).mention}')
@@ -102,33 +88,8 @@ class Shops(commands.Cog):
             smith_table.set_cols_width([20, 5, 7])
             smith_table.header(['Item', 'Qty', 'Cost'])
 
-            weapon_qty = 4 + shop.shelf
-            weapon_type = ctx.bot.compendium.get_object("c_blacksmith_type", "Weapon")
-            weapon_items = list(
-                filter(lambda i: i.sub_type.id == weapon_type.id, list(ctx.bot.compendium.blacksmith[0].values())))
-
-            weapon_stock = roll_stock(ctx.bot.compendium, g, weapon_items, weapon_qty, 1, shop.max_cost)
-
-            weapon_data = []
-            for i in weapon_stock:
-                weapon = ctx.bot.compendium.get_object("blacksmith", i)
-                weapon_data.append([weapon.name, str(weapon_stock[i]), weapon.display_cost()])
-
-            smith_table.add_rows(sort_stock(weapon_data), header=False)
-
-            armor_qty = 4 + shop.shelf
-            armor_type = ctx.bot.compendium.get_object("c_blacksmith_type", "Armor")
-            armor_items = list(filter(lambda i: i.sub_type.id == armor_type.id,
-                                      list(ctx.bot.compendium.blacksmith[0].values())))
-
-            armor_stock = roll_stock(ctx.bot.compendium, g, armor_items, armor_qty, 1, shop.max_cost)
-
-            armor_data = []
-            for i in armor_stock:
-                armor = ctx.bot.compendium.get_object("blacksmith", i)
-                armor_data.append([armor.name, str(armor_stock[i]), armor.display_cost()])
-
-            smith_table.add_rows(sort_stock(armor_data), header=False)
+            smith_table.add_rows([[w.name, str(qty), w.display_cost()] for w, qty in stock["weapon"]], header=False)
+            smith_table.add_rows([[a.name, str(qty), a.display_cost()] for a, qty in stock["armor"]], header=False)
 
             await ctx.delete()
             await ctx.send(f'Rolling stock for {ctx.guild.get_channel(shop.channel_id).mention}')
@@ -142,18 +103,7 @@ class Shops(commands.Cog):
             magic_table.set_cols_width([20, 5, 7])
             magic_table.header(['Item', 'Qty', 'Cost'])
 
-            magic_qty = 9 + (3 * shop.shelf)
-            magic_items = list(ctx.bot.compendium.wondrous[0].values())
-
-            magic_stock = roll_stock(ctx.bot.compendium, g, magic_items, magic_qty, 1, shop.max_cost)
-
-            magic_data = []
-            for m in magic_stock:
-                item = ctx.bot.compendium.get_object("wondrous", m)
-
-                magic_data.append([item.name, str(magic_stock[m]), str(item.cost)])
-
-            magic_table.add_rows(sort_stock(magic_data), header=False)
+            magic_table.add_rows([[m.name, str(qty), str(m.cost)] for m, qty in stock["magic"]], header=False)
 
             await ctx.delete()
             await ctx.send(f'Rolling stock for {ctx.guild.get_channel(shop.channel_id).mention}')
@@ -177,7 +127,7 @@ class Shops(commands.Cog):
         if shop is None:
             return await ctx.respond(embed=ErrorEmbed(description=f"Shop not found"), ephemeral=True)
 
-        g: PlayerGuild = await get_or_create_guild(ctx.bot.db, ctx.guild_id)
+        g: PlayerGuild = await get_or_create_guild(ctx.bot, ctx.guild_id)
 
         if shop.type.id == 1 and (item_record := ctx.bot.compendium.get_object("consumable", item)):  # Consumable
             potion_table = Texttable()
@@ -187,18 +137,9 @@ class Shops(commands.Cog):
 
             potion_table.header(['Item', 'Qty', 'Cost'])
             potion_qty = 1
-            potion_items = list(ctx.bot.compendium.consumable[0].values())
-            potion_stock = roll_stock(ctx.bot.compendium, g, potion_items, potion_qty, 4, shop.max_cost)
-
-            potion_data = []
-            for p in potion_stock:
-                if p == 'Potion of Healing':
-                    potion_data.append([p, str(potion_stock[p]), '50'])
-                else:
-                    potion = ctx.bot.compendium.get_object("consumable", p)
-                    potion_data.append([potion.name, str(potion_stock[p]), str(potion.cost)])
-
-            potion_table.add_rows(sort_stock(potion_data), header=False)
+            potion_stock = roll_stock(ctx.bot.compendium, g, "consumable", potion_qty, 4, shop.max_cost)
+
+            potion_table.add_rows([[p.name, str(qty), str(p.cost)] for p, qty in potion_stock], header=False)
             await ctx.delete()
             await ctx.send(
                 f'Re-rolling stock for {ctx.guild.get_channel(shop.channel_id).mention} replacing {item_record.name}')
@@ -211,16 +152,11 @@ class Shops(commands.Cog):
             scroll_table.set_cols_width([20, 5, 7])
             scroll_table.header(['Item (lvl)', 'Qty', 'Cost'])
             scroll_qty = 1
-            scroll_items = list(ctx.bot.compendium.scroll[0].values())
-
-            scroll_stock = roll_stock(ctx.bot.compendium, g, scroll_items, scroll_qty, 2, shop.max_cost)
 
-            scroll_data = []
-            for s in scroll_stock:
-                scroll = ctx.bot.compendium.get_object("scroll", s)
-                scroll_data.append([scroll.display_name(), str(scroll_stock[s]), str(scroll.cost)])
+            scroll_stock = roll_stock(ctx.bot.compendium, g, "scroll", scroll_qty, 2, shop.max_cost)
 
-            scroll_table.add_rows(sort_stock(scroll_data), header=False)
+            scroll_table.add_rows([[s.display_name(), str(qty), str(s.cost)] for s, qty in scroll_stock],
+                                  header=False)
 
             await ctx.delete()
             await ctx.send(
@@ -238,31 +174,21 @@ class Shops(commands.Cog):
             if item_record.sub_type.value.lower() == "weapon":
                 weapon_qty = 1
                 weapon_type = ctx.bot.compendium.get_object("c_blacksmith_type", "Weapon")
-                weapon_items = list(
-                    filter(lambda i: i.sub_type.id == weapon_type.id, list(ctx.bot.compendium.blacksmith[0].values())))
-
-                weapon_stock = roll_stock(ctx.bot.compendium, g, weapon_items, weapon_qty, 1, shop.max_cost)
 
-                weapon_data = []
-                for i in weapon_stock:
-                    weapon = ctx.bot.compendium.get_object("blacksmith", i)
-                    weapon_data.append([weapon.name, str(weapon_stock[i]), weapon.display_cost()])
+                weapon_stock = roll_stock(ctx.bot.compendium, g, "blacksmith", weapon_qty, 1, shop.max_cost,
+                                          sub_type=weapon_type.id)
 
-                smith_table.add_rows(sort_stock(weapon_data), header=False)
+                smith_table.add_rows([[w.name, str(qty), w.display_cost()] for w, qty in weapon_stock],
+                                     header=False)
             elif item_record.sub_type.value.lower() == "armor":
                 armor_qty = 1
                 armor_type = ctx.bot.compendium.get_object("c_blacksmith_type", "Armor")
-                armor_items = list(filter(lambda i: i.sub_type.id == armor_type.id,
-                                          list(ctx.bot.compendium.blacksmith[0].values())))
 
-                armor_stock = roll_stock(ctx.bot.compendium, g, armor_items, armor_qty, 1, shop.max_cost)
+                armor_stock = roll_stock(ctx.bot.compendium, g, "blacksmith", armor_qty, 1, shop.max_cost,
+                                         sub_type=armor_type.id)
 
-                armor_data = []
-                for i in armor_stock:
-                    armor = ctx.bot.compendium.get_object("blacksmith", i)
-                    armor_data.append([armor.name, str(armor_stock[i]), armor.display_cost()])
-
-                smith_table.add_rows(sort_stock(armor_data), header=False)
+                smith_table.add_rows([[a.name, str(qty), a.display_cost()] for a, qty in armor_stock],
+                                     header=False)
             else:
                 return ctx.respond(embed=ErrorEmbed("Can't reroll this item"), ephemeral=True)
 
@@ -280,17 +206,10 @@ class Shops(commands.Cog):
             magic_table.header(['Item', 'Qty', 'Cost'])
 
             magic_qty = 1
-            magic_items = list(ctx.bot.compendium.wondrous[0].values())
-
-            magic_stock = roll_stock(ctx.bot.compendium, g, magic_items, magic_qty, 1, shop.max_cost)
 
-            magic_data = []
-            for m in magic_stock:
-                mItem = ctx.bot.compendium.get_object("wondrous", m)
+            magic_stock = roll_stock(ctx.bot.compendium, g, "wondrous", magic_qty, 1, shop.max_cost)
 
-                magic_data.append([mItem.name, str(magic_stock[m]), str(mItem.cost)])
-
-            magic_table.add_rows(sort_stock(magic_data), header=False)
+            magic_table.add_rows([[m.name, str(qty), str(m.cost)] for m, qty in magic_stock], header=False)
 
             await ctx.delete()
             await ctx.send(
@@ -319,6 +238,8 @@ class Shops(commands.Cog):
         async with self.bot.db.acquire() as conn:
             await conn.execute(update_shop(shop))
 
+        cache_shop(ctx.bot, shop)
+
         return await ctx.respond(embed=ShopEmbed(ctx, shop))
 
     @shop_commands.command(
@@ -363,6 +284,9 @@ class Shops(commands.Cog):
         async with self.bot.db.acquire() as conn:
             await conn.execute(update_shop(shop))
 
+        cache_shop(ctx.bot, shop)
+
+
     @shop_commands.command(
         name="info",
         description="Get the information for a shop"
@@ -374,7 +298,7 @@ class Shops(commands.Cog):
         if channel is None:
             channel = ctx.channel
 
-        shop: Shop = await get_shop(ctx.bot, None, None, channel.id)
+        shop: Shop = await get_shop(ctx.bot, None, ctx.guild_id, channel.id)
 
         if shop is None:
             shop: Shop = await get_shop(ctx.bot, ctx.author.id, ctx.guild_id, None)
@@ -409,6 +333,8 @@ class Shops(commands.Cog):
         async with self.bot.db.acquire() as conn:
             await conn.execute(update_shop(shop))
 
+        cache_shop(ctx.bot, shop)
+
         return await ctx.respond(embed=ShopEmbed(ctx, shop))
 
     @shop_admin.command(
@@ -459,7 +385,11 @@ class Shops(commands.Cog):
                     active=True, inventory_rolled=False)
 
         async with self.bot.db.acquire() as conn:
-            await conn.execute(insert_new_shop(shop))
+            results = await conn.execute(insert_new_shop(shop))
+            row = await results.first()
+
+        shop: Shop = row_mapper(ShopSchema, ctx.bot.compendium).load(row)
+        cache_shop(ctx.bot, shop)
 
         shopkeep_role = discord.utils.get(ctx.guild.roles, name="Shopkeeper")
 
@@ -508,6 +438,8 @@ class Shops(commands.Cog):
         async with self.bot.db.acquire() as conn:
             await conn.execute(update_shop(shop))
 
+        cache_shop(ctx.bot, shop)
+
         return await ctx.respond(embed=ShopEmbed(ctx, shop))
 
     @shop_admin.command(
@@ -536,6 +468,8 @@ class Shops(commands.Cog):
         async with self.bot.db.acquire() as conn:
             await conn.execute(update_shop(shop))
 
+        cache_shop(ctx.bot, shop)
+
         shopkeep_role = discord.utils.get(ctx.guild.roles, name="Shopkeeper")
 
         if hasattr(owner, "roles"):
@@ -580,10 +514,45 @@ class Shops(commands.Cog):
         async with self.bot.db.acquire() as conn:
             await conn.execute(update_shop(shop))
 
+        cache_shop(ctx.bot, shop)
+
         await sort_shops(ctx, ctx.guild.get_channel(shop.channel_id).category)
 
         return await ctx.respond(embed=ShopEmbed(ctx, shop))
 
+    @shop_admin.command(
+        name="preview_stock",
+        description="Preview a restock of every shop in the server without changing anything"
+    )
+    async def shop_preview_stock(self, ctx: ApplicationContext,
+                                 seed: Option(int, description="Seed to reproduce a previous preview",
+                                              required=False)):
+        await ctx.defer()
+
+        shops = await get_all_shops(ctx.bot, ctx.guild_id)
+
+        if not shops:
+            return await ctx.respond(embed=ErrorEmbed(description=f"No shops found"), ephemeral=True)
+
+        if seed is None:
+            seed = random.randint(0, 2 ** 32 - 1)
+
+        g: PlayerGuild = await get_or_create_guild(ctx.bot, ctx.guild_id)
+        stocks = roll_guild_stock(ctx.bot.compendium, g, shops, np.random.default_rng(seed))
+
+        stock_table = Texttable()
+        stock_table.set_cols_align(['l', 'l', 'c', 'l'])
+        stock_table.set_cols_valign(['m', 'm', 'm', 'm'])
+        stock_table.set_cols_width([15, 20, 5, 7])
+        stock_table.header(['Shop', 'Item', 'Qty', 'Cost'])
+
+        for shop in shops:
+            for stock in stocks[shop.id].values():
+                stock_table.add_rows([[shop.name, i.name, str(qty), str(i.cost)] for i, qty in stock], header=False)
+
+        await ctx.respond(f'Restock preview for {len(shops)} shop(s) with seed `{seed}`')
+        await paginate(ctx, stock_table.draw())
+
     @commands.command("sort")
     async def s_sort(self, ctx: ApplicationContext):
         cat = ctx.guild.get_channel(1055210358794633219)
@@ -607,5 +576,4 @@ async def sort_shops(ctx: ApplicationContext, text_category: CategoryChannel):
     if len(channels) != len(text_category.channels):
         log.error(f"Sort shops indexing issue. There are some non-shop channels intermixed")
 
-    for c in channels:
-        await c.edit(position=channels.index(c))
+    await reorder_channels(ctx.bot, ctx.guild, channels, reason="Sorting shops")
@@ -3,8 +3,11 @@ import logging
 from timeit import default_timer as timer
 from types import NoneType
 
+import numpy as np
+
 from ProphetBot.models.db_objects.item_objects import ItemBlacksmith, ItemWondrous, ItemConsumable, ItemScroll
 from ProphetBot.models.schemas.category_schema import *
+from ProphetBot.models.schemas.row_mapper import row_mapper
 from ProphetBot.models.schemas.item_schema import ItemBlacksmithSchema, ItemWondrousSchema, ItemConsumableSchema, \
     ItemScrollSchema
 from ProphetBot.queries import get_blacksmith_items, get_wondrous_items, get_consumable_items, get_scroll_items
@@ -32,6 +35,83 @@ async def get_table_values(conn, query, obj, schema) -> []:
     return ary
 
 
+async def load_category_table(bot, table, query, obj, schema) -> []:
+    start = timer()
+
+    async with bot.db.acquire() as conn:
+        values = await get_table_values(conn, query, obj, row_mapper(schema))
+
+    end = timer()
+    log.info(f"COMPENDIUM: {table.name} reloaded in [ {end - start:.2f} ]s")
+    return values
+
+
+class ItemIndex(object):
+    """
+    Secondary index over one item node. Items are sorted by cost, and their cost, rarity, sub type, and seeking only
+    flag are kept in parallel NumPy arrays so candidate lookups are a searchsorted plus a mask instead of a scan
+    """
+
+    def __init__(self, items: list):
+        self.items = sorted(items, key=lambda i: i.cost)
+        self.costs = np.array([i.cost for i in self.items], dtype=np.int64)
+        self.rarities = np.array([i.rarity.id for i in self.items], dtype=np.int64)
+        self.sub_types = np.array([i.sub_type.id if hasattr(i, "sub_type") else -1 for i in self.items],
+                                  dtype=np.int64)
+        self.seeking_only = np.array([getattr(i, "seeking_only", False) for i in self.items], dtype=bool)
+        self.candidates = dict()
+
+    def get_candidates(self, max_cost: int, max_rarity: int, sub_type: int = None,
+                       seeking_only: bool = False) -> np.ndarray:
+        """
+        Items at or under a cost and rarity. Results are memoized since the index is rebuilt whenever items reload
+
+        :param max_cost: Maximum item cost
+        :param max_rarity: Maximum Rarity ID
+        :param sub_type: Sub type ID to restrict to. None for all sub types
+        :param seeking_only: Whether to include seeking only items
+        :return: Ascending positions in self.items, so the candidates are sorted by cost
+        """
+        key = (max_cost, max_rarity, sub_type, seeking_only)
+
+        if key not in self.candidates:
+            end = np.searchsorted(self.costs, max_cost, side="right")
+            mask = self.rarities[:end] <= max_rarity
+
+            if sub_type is not None:
+                mask &= self.sub_types[:end] == sub_type
+            if not seeking_only:
+                mask &= ~self.seeking_only[:end]
+
+            self.candidates[key] = np.flatnonzero(mask)
+
+        return self.candidates[key]
+
+
+# (table, query, object, schema) for every category loaded into the compendium
+CATEGORY_TABLES = [
+    (c_rarity_table, get_c_rarity(), Rarity, RaritySchema),
+    (c_blacksmith_type_table, get_c_blacksmith_type(), BlacksmithType, BlacksmithTypeSchema),
+    (c_consumable_type_table, get_c_consumable_type(), ConsumableType, ConsumableTypeSchema),
+    (c_magic_school_table, get_c_magic_school(), MagicSchool, MagicSchoolSchema),
+    (c_character_class_table, get_c_character_class(), CharacterClass, CharacterClassSchema),
+    (c_character_subclass_table, get_c_character_subclass(), CharacterSubclass, CharacterSubclassSchema),
+    (c_character_race_table, get_c_character_race(), CharacterRace, CharacterRaceSchema),
+    (c_character_subrace_table, get_c_character_subrace(), CharacterSubrace, CharacterSubraceSchema),
+    (c_global_modifier_table, get_c_global_modifier(), GlobalModifier, GlobalModifierSchema),
+    (c_host_status_table, get_c_host_status(), HostStatus, HostStatusSchema),
+    (c_arena_tier_table, get_c_arena_tier(), ArenaTier, ArenaTierSchema),
+    (c_adventure_tier_table, get_c_adventure_tier(), AdventureTier, AdventureTierSchema),
+    (c_adventure_rewards_table, get_c_adventure_rewards(), AdventureRewards, AdventureRewardsSchema),
+    (c_shop_type_table, get_c_shop_type(), ShopType, ShopTypeSchema),
+    (c_activity_table, get_c_activity(), Activity, ActivitySchema),
+    (c_faction_table, get_c_faction(), Faction, FactionSchema),
+    (c_dashboard_type_table, get_c_dashboard_type(), DashboardType, DashboardTypeSchema),
+    (c_level_caps_table, get_c_level_caps(), LevelCaps, LevelCapsSchema),
+    (c_shop_tier_table, get_c_shop_tiers(), ShopTier, ShopTierSchema)
+]
+
+
 class Compendium:
 
     # noinspection PyTypeHints
@@ -65,53 +145,50 @@ class Compendium:
         self.c_level_caps = []
         self.c_shop_tier = []
 
+        # Category table name -> checksum of the last loaded rows
+        self.checksums = dict()
+
         # Items
         self.blacksmith = []
         self.wondrous = []
         self.consumable = []
         self.scroll = []
 
-    async def reload_categories(self, bot):
+        # Item node -> ItemIndex
+        self.item_index = dict()
+
+    async def reload_categories(self, bot, force: bool = False):
+        """
+        Reloads any category tables that have changed since the last load. Changed tables are loaded concurrently
+        and swapped in together once every table has finished loading
+
+        :param bot: Bot
+        :param force: Reload every table regardless of whether it has changed
+        """
         start = timer()
 
         if not hasattr(bot, "db"):
             return
 
         async with bot.db.acquire() as conn:
-            self.c_rarity = await get_table_values(conn, get_c_rarity(), Rarity, RaritySchema())
-            self.c_blacksmith_type = await get_table_values(conn, get_c_blacksmith_type(), BlacksmithType,
-                                                            BlacksmithTypeSchema())
-            self.c_consumable_type = await get_table_values(conn, get_c_consumable_type(), ConsumableType,
-                                                            ConsumableTypeSchema())
-            self.c_magic_school = await get_table_values(conn, get_c_magic_school(), MagicSchool,
-                                                         MagicSchoolSchema())
-            self.c_character_class = await get_table_values(conn, get_c_character_class(), CharacterClass,
-                                                            CharacterClassSchema())
-            self.c_character_subclass = await get_table_values(conn, get_c_character_subclass(),
-                                                               CharacterSubclass, CharacterSubclassSchema())
-            self.c_character_race = await get_table_values(conn, get_c_character_race(), CharacterRace,
-                                                           CharacterRaceSchema())
-            self.c_character_subrace = await get_table_values(conn, get_c_character_subrace(), CharacterSubrace,
-                                                              CharacterSubraceSchema())
-            self.c_global_modifier = await get_table_values(conn, get_c_global_modifier(), GlobalModifier,
-                                                            GlobalModifierSchema())
-            self.c_host_status = await get_table_values(conn, get_c_host_status(), HostStatus,
-                                                        HostStatusSchema())
-            self.c_arena_tier = await get_table_values(conn, get_c_arena_tier(), ArenaTier, ArenaTierSchema())
-            self.c_adventure_tier = await get_table_values(conn, get_c_adventure_tier(), AdventureTier,
-                                                           AdventureTierSchema())
-            self.c_adventure_rewards = await get_table_values(conn, get_c_adventure_rewards(), AdventureRewards,
-                                                              AdventureRewardsSchema())
-            self.c_shop_type = await get_table_values(conn, get_c_shop_type(), ShopType, ShopTypeSchema())
-            self.c_activity = await get_table_values(conn, get_c_activity(), Activity, ActivitySchema())
-            self.c_faction = await get_table_values(conn, get_c_faction(), Faction, FactionSchema())
-            self.c_dashboard_type = await get_table_values(conn, get_c_dashboard_type(), DashboardType,
-                                                           DashboardTypeSchema())
-            self.c_level_caps = await get_table_values(conn, get_c_level_caps(), LevelCaps, LevelCapsSchema())
-            self.c_shop_tier = await get_table_values(conn, get_c_shop_tiers(), ShopTier, ShopTierSchema())
+            checksums = {row["table_name"]: row["checksum"] async for row in
+                         conn.execute(get_category_checksums([c[0] for c in CATEGORY_TABLES]))}
+
+        changed = [c for c in CATEGORY_TABLES if force or self.checksums.get(c[0].name) != checksums.get(c[0].name)]
+
+        if len(changed) == 0:
+            log.info(f"COMPENDIUM: No category changes found in [ {timer() - start:.2f} ]s")
+            return
+
+        results = await asyncio.gather(*[load_category_table(bot, *c) for c in changed])
+
+        # No awaits while swapping so lookups never see a partial reload
+        for c, values in zip(changed, results):
+            setattr(self, c[0].name, values)
+            self.checksums[c[0].name] = checksums.get(c[0].name)
 
         end = timer()
-        log.info(f'COMPENDIUM: Categories reloaded in [ {end - start:.2f} ]s')
+        log.info(f'COMPENDIUM: {len(changed)} of {len(CATEGORY_TABLES)} categories reloaded in [ {end - start:.2f} ]s')
         bot.dispatch("compendium_loaded")
 
     async def load_items(self, bot):
@@ -120,14 +197,25 @@ class Compendium:
         else:
             start = timer()
             async with bot.db.acquire() as conn:
-                self.blacksmith = await get_table_values(conn, get_blacksmith_items(), ItemBlacksmith,
-                                                         ItemBlacksmithSchema(self))
-                self.wondrous = await get_table_values(conn, get_wondrous_items(), ItemWondrous,
-                                                       ItemWondrousSchema(self))
-                self.consumable = await get_table_values(conn, get_consumable_items(), ItemConsumable,
-                                                         ItemConsumableSchema(self))
-                self.scroll = await get_table_values(conn, get_scroll_items(), ItemScroll,
-                                                     ItemScrollSchema(self))
+                blacksmith = await get_table_values(conn, get_blacksmith_items(), ItemBlacksmith,
+                                                    row_mapper(ItemBlacksmithSchema, self))
+                wondrous = await get_table_values(conn, get_wondrous_items(), ItemWondrous,
+                                                  row_mapper(ItemWondrousSchema, self))
+                consumable = await get_table_values(conn, get_consumable_items(), ItemConsumable,
+                                                    row_mapper(ItemConsumableSchema, self))
+                scroll = await get_table_values(conn, get_scroll_items(), ItemScroll,
+                                                row_mapper(ItemScrollSchema, self))
+
+            self.item_index = {
+                "blacksmith": ItemIndex(list(blacksmith[0].values())),
+                "wondrous": ItemIndex(list(wondrous[0].values())),
+                "consumable": ItemIndex(list(consumable[0].values())),
+                "scroll": ItemIndex(list(scroll[0].values()))
+            }
+            self.blacksmith = blacksmith
+            self.wondrous = wondrous
+            self.consumable = consumable
+            self.scroll = scroll
 
             end = timer()
             log.info(f"COMPENDIUM: Items reloaded in [ {end - start:.2f} ]s")
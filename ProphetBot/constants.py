@@ -8,7 +8,18 @@ ADMIN_GUILDS = json.loads(os.environ["ADMIN_GUILDS"]) if "ADMIN_GUILDS" in os.en
 BOT_TOKEN = os.environ.get("BOT_TOKEN", "")
 DEFAULT_PREFIX = os.environ.get("COMMAND_PREFIX", ">")
 DEBUG_GUILDS = json.loads(os.environ["GUILD"]) if "GUILD" in os.environ else None
-DASHBOARD_REFRESH_INTERVAL = float(os.environ.get("DASHBOARD_REFRESH_INTERVAL", 15))
+DASHBOARD_REFRESH_INTERVAL = float(os.environ.get("DASHBOARD_REFRESH_INTERVAL", 60))
+DASHBOARD_EDIT_WINDOW = float(os.environ.get("DASHBOARD_EDIT_WINDOW", 5))
+DASHBOARD_CONCURRENCY = int(os.environ.get("DASHBOARD_CONCURRENCY", 8))
+DASHBOARD_GUILD_LIMIT = int(os.environ.get("DASHBOARD_GUILD_LIMIT", 3))
+GLOBAL_FLUSH_INTERVAL = float(os.environ.get("GLOBAL_FLUSH_INTERVAL", 60))
+GLOBAL_SCRAPE_CONCURRENCY = int(os.environ.get("GLOBAL_SCRAPE_CONCURRENCY", 5))
+
+# Cache Stuff
+CHARACTER_CACHE_SIZE = int(os.environ.get("CHARACTER_CACHE_SIZE", 1000))
+CHARACTER_CACHE_TTL = float(os.environ.get("CHARACTER_CACHE_TTL", 300))
+GUILD_CACHE_SIZE = int(os.environ.get("GUILD_CACHE_SIZE", 100))
+GUILD_CACHE_TTL = float(os.environ.get("GUILD_CACHE_TTL", 3600))
 
 # Database Stuff
 DB_URL = os.environ.get("DATABASE_URL", "")
@@ -3,11 +3,12 @@ from typing import Optional, List
 import discord
 from discord import ApplicationContext, Member, Bot, Role
 
+from ProphetBot.cache import LevelHistogram
 from ProphetBot.compendium import Compendium
 from ProphetBot.models.db_objects import PlayerCharacter, PlayerCharacterClass, PlayerGuild, LevelCaps
-from ProphetBot.models.schemas import CharacterSchema, PlayerCharacterClassSchema
+from ProphetBot.models.schemas import CharacterSchema, PlayerCharacterClassSchema, row_mapper
 from ProphetBot.queries import get_log_by_player_and_activity, get_active_character, get_character_class, \
-    get_active_character_from_id, get_all_characters, get_character_from_id
+    get_active_character_from_id, get_all_characters, get_character_from_id, get_guild_character_xp
 
 
 async def remove_fledgling_role(ctx: ApplicationContext, member: Member, reason: Optional[str]):
@@ -58,13 +59,16 @@ async def get_character_quests(bot: Bot, character: PlayerCharacter) -> PlayerCh
 
 async def get_character(bot: Bot, player_id: int, guild_id: int) -> PlayerCharacter | None:
     """
-    Retrieves the given players active character on the server
+    Retrieves the given players active character on the server. Served from the character cache when possible
 
     :param bot: Bot
     :param player_id: Character Member ID
     :param guild_id: guild_id
     :return: PlayerCharacter if found, else None
     """
+    if character := bot.character_cache.get((player_id, guild_id)):
+        return character
+
     async with bot.db.acquire() as conn:
         results = await conn.execute(get_active_character(player_id, guild_id))
         row = await results.first()
@@ -72,15 +76,83 @@ async def get_character(bot: Bot, player_id: int, guild_id: int) -> PlayerCharac
     if row is None:
         return None
     else:
-        character: PlayerCharacter = CharacterSchema(bot.compendium).load(row)
+        character: PlayerCharacter = row_mapper(CharacterSchema, bot.compendium).load(row)
+        bot.character_cache.set((player_id, guild_id), character)
         return character
 
+
+def cache_character(bot: Bot, character: PlayerCharacter):
+    """
+    Refreshes the character cache after a character has been written. Must be called on every path that writes a
+    character so the cache never serves stale data
+
+    :param bot: Bot
+    :param character: PlayerCharacter that was written
+    """
+    if character.active:
+        bot.character_cache.set((character.player_id, character.guild_id), character)
+    else:
+        bot.character_cache.invalidate((character.player_id, character.guild_id))
+
+    record_character_level(bot, character)
+
+
+def record_character_level(bot: Bot, character: PlayerCharacter):
+    """
+    Moves a character within its guild's level histogram, if that histogram has been loaded. Dispatches
+    character_leveled when the character changes bucket, and for every inactive character written while the
+    histogram isn't loaded
+
+    :param bot: Bot
+    :param character: PlayerCharacter that was written
+    """
+    if (histogram := bot.level_histograms.get(character.guild_id)) is None:
+        # Nothing to compare against, but an inactivation still changes the guild's counts
+        if not character.active:
+            bot.dispatch("character_leveled", character.guild_id)
+        return
+
+    level = character.get_level() if character.active else None
+
+    if histogram.levels.get(character.id) != level:
+        histogram.set(character.id, level)
+        bot.dispatch("character_leveled", character.guild_id)
+
+
+async def get_level_histogram(bot: Bot, guild_id: int) -> LevelHistogram:
+    """
+    Gets the level histogram for a guild, building it from the characters table the first time it is needed
+
+    :param bot: Bot
+    :param guild_id: guild_id
+    :return: LevelHistogram
+    """
+    if (histogram := bot.level_histograms.get(guild_id)) is None:
+        levels = dict()
+        async with bot.db.acquire() as conn:
+            async for row in conn.execute(get_guild_character_xp(guild_id)):
+                levels[row["id"]] = PlayerCharacter(xp=row["xp"]).get_level()
+
+        histogram = bot.level_histograms.setdefault(guild_id, LevelHistogram(levels))
+
+    return histogram
+
+
+def invalidate_guild_characters(bot: Bot, guild_id: int):
+    """
+    Drops every cached character for a guild. Used after set-based updates that don't return the rows they change
+
+    :param bot: Bot
+    :param guild_id: guild_id
+    """
+    bot.character_cache.invalidate_where(lambda key: key[1] == guild_id)
+
 async def get_all_player_characters(bot: Bot, player_id: int, guild_id: int) -> list[PlayerCharacter] | None:
     characters = []
     async with bot.db.acquire() as conn:
         async for row in conn.execute(get_all_characters(player_id, guild_id)):
             if row is not None:
-                characters.append(CharacterSchema(bot.compendium).load(row))
+                characters.append(row_mapper(CharacterSchema, bot.compendium).load(row))
 
     if len(characters) == 0:
         return None
@@ -103,7 +175,7 @@ async def get_active_character_from_char_id(bot: Bot, char_id: int) -> PlayerCha
     if row is None:
         return None
 
-    character: PlayerCharacter = CharacterSchema(bot.compendium).load(row)
+    character: PlayerCharacter = row_mapper(CharacterSchema, bot.compendium).load(row)
     return character
 
 async def get_character_from_char_id(bot: Bot, char_id: int) -> PlayerCharacter | None:
@@ -121,7 +193,7 @@ async def get_character_from_char_id(bot: Bot, char_id: int) -> PlayerCharacter
     if row is None:
         return None
 
-    character: PlayerCharacter = CharacterSchema(bot.compendium).load(row)
+    character: PlayerCharacter = row_mapper(CharacterSchema, bot.compendium).load(row)
     return character
 
 
@@ -140,7 +212,7 @@ async def get_player_character_class(bot: Bot, char_id: int) -> List[PlayerChara
     async with bot.db.acquire() as conn:
         async for row in conn.execute(get_character_class(char_id)):
             if row is not None:
-                char_class: PlayerCharacterClass = PlayerCharacterClassSchema(bot.compendium).load(row)
+                char_class: PlayerCharacterClass = row_mapper(PlayerCharacterClassSchema, bot.compendium).load(row)
                 class_ary.append(char_class)
 
     if len(class_ary) == 0:
@@ -1,45 +1,58 @@
 import bisect
 import re
-import random
 from datetime import datetime
 from statistics import mean
 
 import aiopg
 import discord
 from discord import ApplicationContext, Member, Role, Bot, Client
+import numpy as np
 
 from ProphetBot.compendium import Compendium
 from ProphetBot.models.db_objects import PlayerGuild, PlayerCharacter, Adventure, Arena, Shop
 from ProphetBot.models.embeds import ArenaStatusEmbed
 from ProphetBot.models.schemas import GuildSchema, CharacterSchema, AdventureSchema, ArenaSchema, \
-    ShopSchema
+    ShopSchema, row_mapper
 from ProphetBot.queries import get_guild, insert_new_guild, get_adventure_by_category_channel_id, \
-    get_arena_by_channel, get_multiple_characters, update_arena, get_adventure_by_role_id, get_characters, \
-    get_logs_in_past, get_shop_by_owner, get_shop_by_channel, get_shops
+    get_arena_by_channel, get_multiple_characters, update_arena, get_adventure_by_role_id, \
+    get_guild_character_activity, get_shop_by_channel, get_shops
 
+stock_rng = np.random.default_rng()
 
-async def get_or_create_guild(db: aiopg.sa.Engine, guild_id: int) -> PlayerGuild:
+
+async def get_or_create_guild(bot: Bot, guild_id: int) -> PlayerGuild:
     """
-    Retrieves the PlayerGuild object for the current server, or will create a shell object if not found
+    Retrieves the PlayerGuild object for the current server, or will create a shell object if not found.
+    Served from the guild cache when possible, and concurrent callers for the same guild share one load
 
-    :param db: DB Engine
+    :param bot: Bot
     :param guild_id:  Guild ID
     :return: PlayerGuild
     """
-    async with db.acquire() as conn:
-        results = await conn.execute(get_guild(guild_id))
-        g_row = await results.first()
+    async def load_guild() -> PlayerGuild:
+        async with bot.db.acquire() as conn:
+            results = await conn.execute(get_guild(guild_id))
+            g_row = await results.first()
 
-    if g_row is None:
-        g = PlayerGuild(id=guild_id, max_level=3, server_xp=0, weeks=0, week_xp=0, max_reroll=1, xp_adjust=1)
+            if g_row is None:
+                g = PlayerGuild(id=guild_id, max_level=3, server_xp=0, weeks=0, week_xp=0, max_reroll=1,
+                                xp_adjust=1)
+                results = await conn.execute(insert_new_guild(g))
+                g_row = await results.first()
 
-        async with db.acquire() as conn:
-            results = await conn.execute(insert_new_guild(g))
-            g_row = await results.first()
+        return row_mapper(GuildSchema).load(g_row)
 
-    g: PlayerGuild = GuildSchema().load(g_row)
+    return await bot.guild_cache.get_or_load(guild_id, load_guild)
 
-    return g
+
+def cache_guild(bot: Bot, g: PlayerGuild):
+    """
+    Write-through for the guild cache. Must be called after every update_guild
+
+    :param bot: Bot
+    :param g: PlayerGuild that was written
+    """
+    bot.guild_cache.set(g.id, g)
 
 
 async def update_dm(dm: Member, category_permissions: dict, role: Role, adventure_name: str,
@@ -79,7 +92,7 @@ async def get_adventure(bot: Bot, category_id: int) -> Adventure | None:
     if row is None:
         return None
     else:
-        adventure: Adventure = AdventureSchema(bot.compendium).load(row)
+        adventure: Adventure = row_mapper(AdventureSchema, bot.compendium).load(row)
         return adventure
 
 
@@ -98,7 +111,7 @@ async def get_adventure_from_role(bot: Bot, role_id: int) -> Adventure | None:
     if row is None:
         return None
     else:
-        adventure: Adventure = AdventureSchema(bot.compendium).load(row)
+        adventure: Adventure = row_mapper(AdventureSchema, bot.compendium).load(row)
         return adventure
 
 
@@ -117,7 +130,7 @@ async def get_arena(bot: Bot | Client, channel_id: int) -> Arena | None:
     if row is None:
         return None
     else:
-        arena: Arena = ArenaSchema(bot.compendium).load(row)
+        arena: Arena = row_mapper(ArenaSchema, bot.compendium).load(row)
         return arena
 
 
@@ -181,7 +194,7 @@ async def update_arena_tier(ctx: discord.Interaction, db: aiopg.sa.Engine, arena
         async with db.acquire() as conn:
             async for row in await conn.execute(get_multiple_characters(players, ctx.guild_id)):
                 if row is not None:
-                    character: PlayerCharacter = CharacterSchema(compendium).load(row)
+                    character: PlayerCharacter = row_mapper(CharacterSchema, compendium).load(row)
                     chars.append(character)
         if len(chars) > 0:
             avg_level = mean(c.get_level() for c in chars)
@@ -231,25 +244,24 @@ async def end_arena(ctx: ApplicationContext, arena: Arena):
 
 
 async def get_guild_character_summary_stats(bot: Bot, guild_id: int):
+    """
+    Gets the number of active characters on the server, and which of those have no valid logs in the past 30 days.
+    Done in a single query rather than one log lookup per character.
+
+    :param bot: Bot
+    :param guild_id: Guild ID
+    :return: Total number of active characters, List[PlayerCharacter] of inactive characters if any, else None
+    """
     inactive = []
-    chars = []
     total = 0
 
     async with bot.db.acquire() as conn:
-        async for row in await conn.execute(get_characters(guild_id)):
+        async for row in conn.execute(get_guild_character_activity(guild_id)):
             if row is not None:
-                character: PlayerCharacter = CharacterSchema(bot.compendium).load(row)
-                chars.append(character)
                 total += 1
-
-    if len(chars) > 0:
-        for c in chars:
-            async with bot.db.acquire() as conn:
-                results = await conn.execute(get_logs_in_past(c.id))
-                row = await results.first()
-
-            if row is None:
-                inactive.append(c)
+                if not row["recent_activity"]:
+                    character: PlayerCharacter = row_mapper(CharacterSchema, bot.compendium).load(row)
+                    inactive.append(character)
 
     if len(inactive) == 0:
         inactive = None
@@ -257,40 +269,88 @@ async def get_guild_character_summary_stats(bot: Bot, guild_id: int):
     return total, inactive
 
 
-def roll_stock(compendium, g: PlayerGuild, items: [], quantity: int, max_qty: int, max_cost: int = 1000000, num_offset: int = 0):
+def roll_stock(compendium, g: PlayerGuild, node: str, quantity: int, max_qty: int, max_cost: int = 1000000,
+               num_offset: int = 0, sub_type: int = None, rng: np.random.Generator = None) -> list:
+    """
+    Rolls random stock from an item node. All picks and quantities are drawn in one vectorized call
+
+    :param compendium: Compendium
+    :param g: PlayerGuild used to determine the shop tier
+    :param node: Compendium item node to roll from
+    :param quantity: Number of picks
+    :param max_qty: Maximum quantity per pick
+    :param max_cost: Maximum item cost
+    :param num_offset: Number of picks to remove from the quantity
+    :param sub_type: Sub type ID to restrict to
+    :param rng: Generator to draw from. Pass a seeded Generator for reproducible stock
+    :return: List of (item, quantity) sorted by item cost
+    """
     idx = bisect.bisect(list(compendium.c_shop_tier[0].keys()), g.max_level)
     id = list(compendium.c_shop_tier[0].keys())[idx - 1]
     tier = compendium.get_object("c_shop_tier", id)
     max_cost = 1000000 if max_cost is None else max_cost
+    rng = stock_rng if rng is None else rng
 
-    if len(items) == 0:
-        return None
-    elif hasattr(items[1], "seeking_only"):
-        filtered_items = list(
-            filter(lambda i: i.cost <= max_cost and i.seeking_only is False and i.rarity.id <= tier.rarity,
-                   items))
-    else:
-        filtered_items = list(
-            filter(lambda i: i.cost <= max_cost and i.rarity.id <= tier.rarity,
-                   items))
-    if len(filtered_items) == 0:
-        return None
+    index = compendium.item_index[node]
+    candidates = index.get_candidates(max_cost, tier.rarity, sub_type)
 
-    stock = dict()
+    if len(candidates) == 0 or quantity - num_offset <= 0:
+        return []
 
-    if quantity - num_offset <= 0:
-        return None
+    picks = rng.choice(candidates, size=quantity - num_offset)
+    quantities = rng.integers(1, max(max_qty, 1), size=quantity - num_offset, endpoint=True)
+    totals = np.bincount(picks, weights=quantities, minlength=len(index.items))
+
+    # Candidate positions are cost ordered, so the stock comes out sorted
+    return [(index.items[i], int(totals[i])) for i in np.flatnonzero(totals)]
 
-    for i in range(quantity - num_offset):
-        rand_item = random.choice(filtered_items)
-        qty = random.randint(1, max_qty if max_qty > 1 else 1)
 
-        if rand_item.name in stock.keys():
-            stock[rand_item.name] = stock[rand_item.name] + qty
-        else:
-            stock[rand_item.name] = qty
+def roll_shop_stock(compendium, g: PlayerGuild, shop: Shop, rng: np.random.Generator = None) -> dict:
+    """
+    Rolls a full inventory for a shop
+
+    :param compendium: Compendium
+    :param g: PlayerGuild
+    :param shop: Shop to roll for
+    :param rng: Generator to draw from
+    :return: Dictionary of stock name to a list of (item, quantity) sorted by cost
+    """
+    match shop.type.id:
+        case 1:  # Consumable
+            return {
+                "potion": roll_stock(compendium, g, "consumable", 3 + shop.shelf, 4, shop.max_cost, 1, rng=rng),
+                "scroll": roll_stock(compendium, g, "scroll", 6 + (3 * shop.shelf), 2, shop.max_cost, rng=rng)
+            }
+        case 2:  # Blacksmith
+            weapon_type = compendium.get_object("c_blacksmith_type", "Weapon")
+            armor_type = compendium.get_object("c_blacksmith_type", "Armor")
+            return {
+                "weapon": roll_stock(compendium, g, "blacksmith", 4 + shop.shelf, 1, shop.max_cost,
+                                     sub_type=weapon_type.id, rng=rng),
+                "armor": roll_stock(compendium, g, "blacksmith", 4 + shop.shelf, 1, shop.max_cost,
+                                    sub_type=armor_type.id, rng=rng)
+            }
+        case 3:  # Magic Shops
+            return {
+                "magic": roll_stock(compendium, g, "wondrous", 9 + (3 * shop.shelf), 1, shop.max_cost, rng=rng)
+            }
+
+    return {}
+
+
+def roll_guild_stock(compendium, g: PlayerGuild, shops: list[Shop], rng: np.random.Generator = None) -> dict:
+    """
+    Rolls inventories for every given shop in one batch from a single Generator, so a seeded Generator gives a
+    reproducible preview of a week's restock
 
-    return stock
+    :param compendium: Compendium
+    :param g: PlayerGuild
+    :param shops: List of Shops to roll for
+    :param rng: Generator to draw from, e.g. np.random.default_rng(seed)
+    :return: Dictionary of shop id to the stock from roll_shop_stock
+    """
+    rng = rng if rng is not None else np.random.default_rng()
+    return {shop.id: roll_shop_stock(compendium, g, shop, rng) for shop in shops}
 
 
 def sort_stock(stock):
@@ -309,29 +369,46 @@ async def paginate(ctx: ApplicationContext, result: str):
         await ctx.send(f'```\n{result}```')
 
 
+async def load_guild_shops(bot: Bot | Client, guild_id: int):
+    """
+    Loads a guild's active shops into bot.shop_registry if they aren't there already
+
+    :param bot: Bot
+    :param guild_id: guild_id
+    """
+    if guild_id in bot.shop_registry:
+        return
+
+    async with bot.db.acquire() as conn:
+        results = await conn.execute(get_shops(guild_id))
+        rows = await results.fetchall()
+
+    bot.shop_registry.load(guild_id, [row_mapper(ShopSchema, bot.compendium).load(row) for row in rows])
+
+
 async def get_shop(bot: Bot | Client, owner_id: int | None, guild_id: int | None, channel_id: int | None = None) -> Shop | None:
 
-    if channel_id is None:
-        async with bot.db.acquire() as conn:
-            results = await conn.execute(get_shop_by_owner(owner_id, guild_id))
-            row = await results.first()
-    else:
-        async with bot.db.acquire() as conn:
-            results = await conn.execute(get_shop_by_channel(channel_id))
-            row = await results.first()
+    if guild_id is not None:
+        await load_guild_shops(bot, guild_id)
+
+        if channel_id is None:
+            return bot.shop_registry.get_by_owner(guild_id, owner_id)
+        return bot.shop_registry.get_by_channel(channel_id)
+
+    async with bot.db.acquire() as conn:
+        results = await conn.execute(get_shop_by_channel(channel_id))
+        row = await results.first()
 
     if row is None:
         return None
     else:
-        shop: Shop = ShopSchema(bot.compendium).load(row)
+        shop: Shop = row_mapper(ShopSchema, bot.compendium).load(row)
         return shop
 
+
 async def get_all_shops(bot: Bot | Client, guild_id: int) -> list[Shop] | None:
-    shops = []
-    async with bot.db.acquire() as conn:
-        async for row in conn.execute(get_shops(guild_id)):
-            if row is not None:
-                shops.append(ShopSchema(bot.compendium).load(row))
+    await load_guild_shops(bot, guild_id)
+    shops = bot.shop_registry.get_all(guild_id)
 
     if len(shops) == 0:
         return None
@@ -339,6 +416,18 @@ async def get_all_shops(bot: Bot | Client, guild_id: int) -> list[Shop] | None:
     return shops
 
 
+def cache_shop(bot: Bot | Client, shop: Shop):
+    """
+    Write-through for the shop registry. Must be called after every insert_new_shop and update_shop. Dispatches
+    shop_updated
+
+    :param bot: Bot
+    :param shop: Shop that was written
+    """
+    bot.shop_registry.set(shop)
+    bot.dispatch("shop_updated", shop.guild_id)
+
+
 async def get_player_adventures(bot: Bot | Client, player: Member):
     adventures = {}
     adventures['player'] = []
@@ -1,5 +1,9 @@
+import io
+from functools import lru_cache
+
 import discord
-from PIL import Image, ImageDraw
+import numpy as np
+from PIL import Image, ImageDraw, ImageFilter
 from discord import ApplicationContext
 from sqlalchemy.util import asyncio
 
@@ -71,6 +75,32 @@ async def confirm(ctx, message, delete_msgs=False, response_check=get_positivity
     return reply_bool
 
 
+async def reorder_channels(bot: discord.Bot, guild: discord.Guild, channels: list[discord.abc.GuildChannel],
+                           reason: str | None = None) -> int:
+    """
+    Puts channels in the given order with a single bulk position update. The channels keep the set of positions they
+    already hold, handed out in the new order, so only channels whose position actually changes are sent
+
+    :param bot: Bot
+    :param guild: Guild the channels belong to
+    :param channels: Channels in their desired order
+    :param reason: Audit log reason
+    :return: Number of channels moved
+    """
+    targets = sorted(c.position for c in channels)
+
+    # Duplicate positions can't be handed out unambiguously, so renumber the whole list instead
+    if len(set(targets)) != len(targets):
+        targets = list(range(len(channels)))
+
+    moves = [{"id": c.id, "position": p} for c, p in zip(channels, targets) if c.position != p]
+
+    if len(moves) > 0:
+        await bot.http.bulk_channel_update(guild.id, moves, reason=reason)
+
+    return len(moves)
+
+
 def auth_and_chan(ctx):
     """Message check: same author and channel"""
 
@@ -80,21 +110,50 @@ def auth_and_chan(ctx):
     return chk
 
 
-def draw_progress_bar(d, x, y, w, h, progress, bg="black"):
+PROGRESS_COLORS = ((255, 0, 0), (255, 165, 0), (255, 255, 0), (0, 255, 0), (75, 0, 130), (127, 0, 255))
+
+
+def render_progress_bar(progress: float) -> bytes:
+    """
+    Renders the guild progress bar as PNG bytes. Progress is quantized to whole percents, and each value is only ever
+    drawn once
+
+    :param progress: Progress between 0 and 1
+    :return: PNG image bytes
+    """
+    return _render_progress_bar(round(progress, 2))
+
+
+@lru_cache(maxsize=128)
+def _render_progress_bar(progress: float) -> bytes:
+    width = 500
+    height = int(width * .15)
+    scale = .86
+
+    out = Image.new("RGBA", (width, height), (0, 0, 0, 0))
+    draw_progress_bar(out, 0, 0, int(width * scale), int(height * scale), progress)
+    sharp_out = out.filter(ImageFilter.SHARPEN)
+
+    with io.BytesIO() as output:
+        sharp_out.save(output, format="PNG")
+        return output.getvalue()
+
+
+def draw_progress_bar(image: Image.Image, x, y, w, h, progress, bg="black") -> Image.Image:
+    d = ImageDraw.Draw(image)
+
     # draw background
     d.ellipse((x + w, y, x + h + w, y + h), fill=bg)
     d.ellipse((x, y, x + h, y + h), fill=bg)
     d.rectangle((x + (h / 2), y, x + w + (h / 2), y + h), fill=bg, width=10)
 
-    COLOR = [(255, 0, 0), (255, 165, 0), (255, 255, 0), (0, 255, 0), (75, 0, 130), (127,0,255)]
-
     # draw progress bar
     if progress > .95:
         w *= progress
 
         d.ellipse((x + w, y, x + h + w, y + h), fill=(127,0,255))
         d.ellipse((x, y, x + h, y + h), fill='red')
-        horizontal_gradient(d, Rect(x + (h / 2), y, x + w + (h / 2), y + h), gradient_color, COLOR)
+        horizontal_gradient(image, Rect(x + (h / 2), y, x + w + (h / 2), y + h), PROGRESS_COLORS)
 
     elif progress < .05:
         w *= progress
@@ -113,9 +172,9 @@ def draw_progress_bar(d, x, y, w, h, progress, bg="black"):
         w *= progress
 
         d.ellipse((x, y, x + h, y + h), fill='red')
-        horizontal_gradient(d, Rect(x + (h / 2), y, x + w + (h / 2), y + h), gradient_color, COLOR)
+        horizontal_gradient(image, Rect(x + (h / 2), y, x + w + (h / 2), y + h), PROGRESS_COLORS)
 
-    return d
+    return image
 
 
 class Rect(object):
@@ -132,26 +191,26 @@ class Point(object):
     def __init__(self, x, y):
         self.x, self.y = x, y
 
-def horizontal_gradient(draw, rect, color_func, color_palette):
-    minval, maxval = 1, len(color_palette)
-    delta = maxval - minval
-    width = float(rect.width)  # Cache.
-    for x in range(int(rect.min.x), int(rect.max.x+1)):
-        f = (x - rect.min.x) / width
-        val = minval + f * delta
-        color = color_func(minval, maxval, val, color_palette)
-        draw.line([(x, rect.min.y), (x, rect.max.y)], fill=color)
-
-def gradient_color(minval, maxval, val, color_palette):
-    """ Computes intermediate RGB color of a value in the range of minval
-        to maxval (inclusive) based on a color_palette representing the range.
+def horizontal_gradient(image, rect, color_palette):
+    strip = gradient_strip(rect.min.x, rect.max.x, int(rect.max.y) - int(rect.min.y) + 1, tuple(color_palette))
+    image.paste(strip, (int(rect.min.x), int(rect.min.y)))
+
+@lru_cache(maxsize=128)
+def gradient_strip(minx, maxx, height, color_palette) -> Image.Image:
+    """ Precomputes a horizontal gradient spanning the color_palette, one pixel
+        column per x from minx to maxx (inclusive).
     """
-    max_index = len(color_palette)-1
+    max_index = len(color_palette) - 1
+    palette = np.array(color_palette, dtype=float)
+
+    # Same float steps as the old per-pixel version (x -> f -> val -> v) so int() truncates identically
+    minval, maxval = 1, len(color_palette)
     delta = maxval - minval
-    if delta == 0:
-        delta = 1
-    v = float(val-minval) / delta * max_index
-    i1, i2 = int(v), min(int(v)+1, max_index)
-    (r1, g1, b1), (r2, g2, b2) = color_palette[i1], color_palette[i2]
-    f = v - i1
-    return int(r1 + f*(r2-r1)), int(g1 + f*(g2-g1)), int(b1 + f*(b2-b1))
\ No newline at end of file
+    f = (np.arange(int(minx), int(maxx + 1)) - minx) / float(maxx - minx)
+    val = minval + f * delta
+    v = (val - minval) / delta * max_index
+    i1 = v.astype(int)
+    i2 = np.minimum(i1 + 1, max_index)
+    f = (v - i1)[:, np.newaxis]
+    columns = (palette[i1] + f * (palette[i2] - palette[i1])).astype(np.uint8)
+    return Image.fromarray(np.repeat(columns[np.newaxis, :, :], height, axis=0), "RGB")
@@ -2,11 +2,13 @@ from typing import Any
 
 from discord import ApplicationContext, Bot
 
-from ProphetBot.helpers.entity_helpers import get_or_create_guild
-from ProphetBot.helpers.character_helpers import get_level_cap
+from ProphetBot.compendium import Compendium
+from ProphetBot.helpers.entity_helpers import get_or_create_guild, cache_guild
+from ProphetBot.helpers.character_helpers import get_level_cap, cache_character
 from ProphetBot.models.db_objects import PlayerCharacter, Activity, LevelCaps, PlayerGuild, DBLog, Adventure
-from ProphetBot.models.schemas import LogSchema
-from ProphetBot.queries import insert_new_log, update_character, update_guild, get_log_by_id
+from ProphetBot.models.schemas import LogSchema, row_mapper
+from ProphetBot.queries import insert_new_log, update_character, update_guild, get_log_by_id, insert_new_logs, \
+    update_character_balances
 
 
 def get_activity_amount(character: PlayerCharacter, activity: Activity, cap: LevelCaps, g: PlayerGuild, gold: int,
@@ -57,6 +59,40 @@ def get_activity_amount(character: PlayerCharacter, activity: Activity, cap: Lev
     return char_gold, char_xp, char_div_xp, server_xp
 
 
+def build_log(compendium: Compendium, author_id: int, character: PlayerCharacter, activity: Activity,
+              g: PlayerGuild, notes: str = None, gold: int = 0, xp: int = 0, adventure: Adventure = None) -> DBLog:
+    """
+    Calculates a log in memory and applies the rewards to the character and guild. Nothing is written to the database
+
+    :param compendium: Compendium
+    :param author_id: Member ID of the log author
+    :param character: PlayerCharacter the log is for
+    :param activity: Activity the log is for
+    :param g: PlayerGuild to apply any excess to
+    :param notes: Any notes/reason for the log
+    :param gold: Manual override
+    :param xp: Manual override
+    :param adventure: Adventure
+    :return: DBLog for the character
+    """
+    cap: LevelCaps = get_level_cap(character, g, compendium)
+    adventure_id = None if adventure is None else adventure.id
+
+    char_gold, char_xp, char_div_xp, server_xp = get_activity_amount(character, activity, cap, g, gold, xp)
+
+    char_log = DBLog(author=author_id, xp=char_xp, gold=char_gold, character_id=character.id, activity=activity,
+                     notes=notes, adventure_id=adventure_id, server_xp=server_xp, invalid=False)
+    character.gold += char_gold
+    character.xp += char_xp
+    g.week_xp += server_xp
+
+    if activity.diversion:
+        character.div_gold += char_gold
+        character.div_xp += char_div_xp
+
+    return char_log
+
+
 async def create_logs(ctx: ApplicationContext | Any, character: PlayerCharacter, activity: Activity, notes: str = None,
                       gold: int = 0, xp: int = 0, adventure: Adventure = None) -> DBLog:
     """
@@ -81,21 +117,8 @@ async def create_logs(ctx: ApplicationContext | Any, character: PlayerCharacter,
     else:
         author_id = ctx.author.id
 
-    g: PlayerGuild = await get_or_create_guild(ctx.bot.db, guild_id)
-    cap: LevelCaps = get_level_cap(character, g, ctx.bot.compendium)
-    adventure_id = None if adventure is None else adventure.id
-
-    char_gold, char_xp, char_div_xp, server_xp = get_activity_amount(character, activity, cap, g, gold, xp)
-
-    char_log = DBLog(author=author_id, xp=char_xp, gold=char_gold, character_id=character.id, activity=activity,
-                     notes=notes, adventure_id=adventure_id, server_xp=server_xp, invalid=False)
-    character.gold += char_gold
-    character.xp += char_xp
-    g.week_xp += server_xp
-
-    if activity.diversion:
-        character.div_gold += char_gold
-        character.div_xp += char_div_xp
+    g: PlayerGuild = await get_or_create_guild(ctx.bot, guild_id)
+    char_log = build_log(ctx.bot.compendium, author_id, character, activity, g, notes, gold, xp, adventure)
 
     async with ctx.bot.db.acquire() as conn:
         results = await conn.execute(insert_new_log(char_log))
@@ -103,11 +126,63 @@ async def create_logs(ctx: ApplicationContext | Any, character: PlayerCharacter,
         await conn.execute(update_character(character))
         await conn.execute(update_guild(g))
 
-    log_entry: DBLog = LogSchema(ctx.bot.compendium).load(row)
+    cache_guild(ctx.bot, g)
+    cache_character(ctx.bot, character)
+    ctx.bot.dispatch("log_created", g.id)
+    log_entry: DBLog = row_mapper(LogSchema, ctx.bot.compendium).load(row)
 
     return log_entry
 
 
+async def create_logs_bulk(ctx: ApplicationContext | Any,
+                           entries: list[tuple[PlayerCharacter, Activity, str | None, int, int]],
+                           adventure: Adventure = None) -> list[DBLog]:
+    """
+    Creates many Activity logs at once. Rewards are calculated in memory and the logs, characters, and guild are
+    written in a single transaction
+
+    :param ctx: Context
+    :param entries: List of (character, activity, notes, gold, xp) tuples. Gold and xp are manual overrides
+    :param adventure: Adventure
+    :return: List of DBLogs in the same order as the entries
+    """
+    if len(entries) == 0:
+        return []
+
+    if not hasattr(ctx, "guild_id"):
+        guild_id = ctx.bot.get_guild(entries[0][0].guild_id).id
+    else:
+        guild_id = ctx.guild_id
+
+    if not hasattr(ctx, "author"):
+        author_id = ctx.bot.user.id
+    else:
+        author_id = ctx.author.id
+
+    g: PlayerGuild = await get_or_create_guild(ctx.bot, guild_id)
+    characters = dict()
+    log_list = []
+
+    for character, activity, notes, gold, xp in entries:
+        log_list.append(build_log(ctx.bot.compendium, author_id, character, activity, g, notes, gold, xp, adventure))
+        characters[character.id] = character
+
+    async with ctx.bot.db.acquire() as conn:
+        async with conn.begin():
+            results = await conn.execute(insert_new_logs(log_list))
+            rows = await results.fetchall()
+            await conn.execute(update_character_balances(list(characters.values())))
+            await conn.execute(update_guild(g))
+
+    cache_guild(ctx.bot, g)
+    for character in characters.values():
+        cache_character(ctx.bot, character)
+    ctx.bot.dispatch("log_created", g.id)
+
+    # RETURNING rows come back in no guaranteed order, but ids are assigned in VALUES order
+    return [row_mapper(LogSchema, ctx.bot.compendium).load(row) for row in sorted(rows, key=lambda r: r["id"])]
+
+
 async def get_log(bot: Bot, log_id: int) -> DBLog | None:
     async with bot.db.acquire() as conn:
         results = await conn.execute(get_log_by_id(log_id))
@@ -116,6 +191,6 @@ async def get_log(bot: Bot, log_id: int) -> DBLog | None:
     if row is None:
         return None
 
-    log_entry = LogSchema(bot.compendium).load(row)
+    log_entry = row_mapper(LogSchema, bot.compendium).load(row)
 
     return log_entry
@@ -5,35 +5,136 @@ from discord.ext.commands import Bot
 
 from ProphetBot.compendium import Compendium
 from ProphetBot.models.db_objects import RefCategoryDashboard, RefWeeklyStipend, GlobalPlayer, GlobalEvent, \
-    GlobalModifier, HostStatus
+    GlobalModifier, HostStatus, RefChannelLastMessage
 from ProphetBot.models.schemas import RefCategoryDashboardSchema, RefWeeklyStipendSchema, GlobalPlayerSchema, \
-    GlobalEventSchema
+    GlobalEventSchema, RefChannelLastMessageSchema, row_mapper
 from ProphetBot.queries import get_dashboard_by_category_channel, get_weekly_stipend_query, get_all_global_players, \
-    get_active_global, get_global_player, delete_global_event, delete_global_players
+    get_active_global, get_global_player, delete_global_event, delete_global_players, get_dashboards, \
+    get_channel_last_messages, get_global_channels, delete_global_channels
 
 
-async def get_dashboard_from_category_channel_id(category_channel_id: int, db: aiopg.sa.Engine) -> RefCategoryDashboard | None:
-    # category_channel_id = ctx.channel.category_id
+async def get_dashboard_from_category_channel_id(bot: Bot, category_channel_id: int) -> RefCategoryDashboard | None:
+    """
+    Gets the dashboard for a category. Categories are looked up in bot.dashboard_cache first, which also remembers
+    categories without a dashboard, so the database is only hit the first time an unknown category is seen.
 
+    :param bot: Bot
+    :param category_channel_id: CategoryChannel id
+    :return: RefCategoryDashboard if one exists for the category
+    """
     if category_channel_id is None:
         return None
 
-    async with db.acquire() as conn:
+    if category_channel_id in bot.dashboard_cache:
+        return bot.dashboard_cache[category_channel_id]
+
+    async with bot.db.acquire() as conn:
         results = await conn.execute(get_dashboard_by_category_channel(category_channel_id))
         row = await results.first()
 
-    if row is None:
+    dashboard = None if row is None else row_mapper(RefCategoryDashboardSchema).load(row)
+    bot.dashboard_cache[category_channel_id] = dashboard
+    return dashboard
+
+
+async def load_dashboards(bot: Bot) -> list[RefCategoryDashboard]:
+    """
+    Reads every dashboard and rebuilds bot.dashboard_cache from them. Every other category the bot can see is cached
+    as having no dashboard.
+
+    :param bot: Bot
+    :return: List of all RefCategoryDashboards
+    """
+    async with bot.db.acquire() as conn:
+        results = await conn.execute(get_dashboards())
+        rows = await results.fetchall()
+
+    dashboards = [row_mapper(RefCategoryDashboardSchema).load(row) for row in rows]
+    dashboard_cache = {category.id: None for guild in bot.guilds for category in guild.categories}
+    dashboard_cache.update({d.category_channel_id: d for d in dashboards})
+    bot.dashboard_cache = dashboard_cache
+
+    return dashboards
+
+
+def cache_dashboard(bot: Bot, dashboard: RefCategoryDashboard):
+    """
+    Write-through for the dashboard cache. Must be called after every insert_new_dashboard and update_dashboard
+
+    :param bot: Bot
+    :param dashboard: RefCategoryDashboard that was written
+    """
+    bot.dashboard_cache[dashboard.category_channel_id] = dashboard
+
+
+def uncache_dashboard(bot: Bot, dashboard: RefCategoryDashboard):
+    """
+    Marks a dashboard's category as having no dashboard. Must be called after every delete_dashboard
+
+    :param bot: Bot
+    :param dashboard: RefCategoryDashboard that was deleted
+    """
+    bot.dashboard_cache[dashboard.category_channel_id] = None
+
+async def load_channel_last_messages(bot: Bot):
+    """
+    Loads the persisted last-message summaries into bot.last_messages
+
+    :param bot: Bot
+    """
+    async with bot.db.acquire() as conn:
+        results = await conn.execute(get_channel_last_messages())
+        rows = await results.fetchall()
+
+    bot.last_messages = {s.channel_id: s for s in [row_mapper(RefChannelLastMessageSchema).load(row) for row in rows]}
+
+
+def summarize_message(channel: TextChannel, message: discord.Message | None,
+                      magewright_role: Role | None) -> RefChannelLastMessage:
+    """
+    Reduces a channel's latest message to what the RP dashboard needs from it
+
+    :param channel: TextChannel the message is in
+    :param message: Latest Message in the channel, or None if there isn't one
+    :param magewright_role: Magewright Role for the guild
+    :return: RefChannelLastMessage
+    """
+    # Only the explicit blank markers free a channel. Attachment or embed only posts have no content but are in use
+    empty = message is None or message.content in ["```\n​\n```", "```\n \n```"]
+    magewright = not empty and magewright_role is not None and magewright_role.mention in message.content
+
+    return RefChannelLastMessage(channel_id=channel.id, category_channel_id=channel.category_id,
+                                 message_id=message.id if message is not None else None,
+                                 author_id=message.author.id if message is not None else None,
+                                 empty=empty, magewright=magewright)
+
+
+async def get_last_message(channel: TextChannel, reread: bool = False) -> discord.Message | None:
+    """
+    Gets the latest message in a channel
+
+    :param channel: TextChannel
+    :param reread: Read the channel's history instead of trusting last_message_id. Needed after the latest message is
+        deleted, since the gateway keeps pointing last_message_id at the deleted message. Also done automatically when
+        that message can't be fetched
+    :return: Latest Message, or None if the channel is empty or can't be read
+    """
+    if reread:
+        try:
+            async for message in channel.history(limit=1):
+                return message
+        except discord.errors.HTTPException as e:
+            print(f"Skipping channel {channel.name}: [ {e} ]")
         return None
-    else:
-        dashboard: RefCategoryDashboard = RefCategoryDashboardSchema().load(row)
-        return dashboard
 
-async def get_last_message(channel: TextChannel) -> discord.Message | None:
     last_message = channel.last_message
     if last_message is None:
         try:
             lm_id = channel.last_message_id
             last_message = await channel.fetch_message(lm_id) if lm_id is not None else None
+        except discord.errors.NotFound:
+            # last_message_id still points at a deleted message
+            return await get_last_message(channel, reread=True)
         except discord.errors.HTTPException as e:
             print(f"Skipping channel {channel.name}: [ {e} ]")
             return None
@@ -48,7 +149,7 @@ async def get_weekly_stipend(db: aiopg.sa.Engine, role: Role) -> RefWeeklyStipen
     if row is None:
         return None
     else:
-        stipend: RefWeeklyStipend = RefWeeklyStipendSchema().load(row)
+        stipend: RefWeeklyStipend = row_mapper(RefWeeklyStipendSchema).load(row)
         return stipend
 
 
@@ -75,13 +176,33 @@ def calc_amt(compendium: Compendium, base: int, pmod: GlobalModifier = None, hos
     return amt
 
 
+def calc_rewards(compendium: Compendium, g_event: GlobalEvent, players: list[GlobalPlayer]):
+    """
+    Recalculates gold and xp for many GlobalPlayers in place. Rewards only depend on the modifier and host status, so
+    calc_amt runs once per distinct pair instead of once per player
+
+    :param compendium: Compendium
+    :param g_event: GlobalEvent with the base rewards
+    :param players: GlobalPlayers to recalculate
+    """
+    rewards = dict()
+
+    for p in players:
+        key = (p.modifier.id if p.modifier is not None else None, p.host.id if p.host is not None else None)
+        if key not in rewards:
+            rewards[key] = (calc_amt(compendium, g_event.base_gold, p.modifier, p.host),
+                            calc_amt(compendium, g_event.base_xp, p.modifier, p.host))
+
+        p.gold, p.xp = rewards[key]
+
+
 async def get_all_players(bot: Bot, guild_id: int) -> dict:
     players = dict()
 
     async with bot.db.acquire() as conn:
         async for row in conn.execute(get_all_global_players(guild_id)):
             if row is not None:
-                player: GlobalPlayer = GlobalPlayerSchema(bot.compendium).load(row)
+                player: GlobalPlayer = row_mapper(GlobalPlayerSchema, bot.compendium).load(row)
                 players[player.player_id] = player
 
     return players
@@ -94,7 +215,7 @@ async def get_player(bot: Bot, gulid_id: int, player_id: int) -> GlobalPlayer |
     if row is None:
         return None
 
-    player: GlobalPlayer = GlobalPlayerSchema(bot.compendium).load(row)
+    player: GlobalPlayer = row_mapper(GlobalPlayerSchema, bot.compendium).load(row)
 
     return player
 
@@ -103,14 +224,17 @@ async def get_global(bot: Bot, guild_id: int) -> GlobalEvent | None:
         results = await conn.execute(get_active_global(guild_id))
         row = await results.first()
 
-    if row is None:
-        return None
-    else:
-        glob: GlobalEvent = GlobalEventSchema(bot.compendium).load(row)
+        if row is None:
+            return None
+
+        glob: GlobalEvent = row_mapper(GlobalEventSchema, bot.compendium).load(row)
+        glob.last_message_ids = {r["channel_id"]: r["last_message_id"]
+                                 async for r in conn.execute(get_global_channels(guild_id))}
         return glob
 
 async def close_global(db: aiopg.sa.Engine, guild_id: int):
     async with db.acquire() as conn:
         await conn.execute(delete_global_event(guild_id))
         await conn.execute(delete_global_players(guild_id))
+        await conn.execute(delete_global_channels(guild_id))
 
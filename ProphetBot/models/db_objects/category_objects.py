@@ -3,6 +3,8 @@ from discord import ApplicationContext, Role
 
 
 class Rarity(object):
+    __slots__ = ("id", "value", "abbreviation", "seek_dc")
+
     def __init__(self, id, value, abbreviation, seek_dc):
         """
         :param id: int
@@ -17,6 +19,8 @@ class Rarity(object):
 
 
 class BlacksmithType(object):
+    __slots__ = ("id", "value")
+
     def __init__(self, id, value):
         """
         :param id: int
@@ -28,6 +32,8 @@ class BlacksmithType(object):
 
 
 class ConsumableType(object):
+    __slots__ = ("id", "value")
+
     def __init__(self, id, value):
         """
         :param id: int
@@ -39,6 +45,8 @@ class ConsumableType(object):
 
 
 class MagicSchool(object):
+    __slots__ = ("id", "value")
+
     def __init__(self, id, value):
         """
         :param id: int
@@ -50,6 +58,8 @@ class MagicSchool(object):
 
 
 class CharacterClass(object):
+    __slots__ = ("id", "value")
+
     def __init__(self, id, value):
         """
         :param id: int
@@ -61,6 +71,8 @@ class CharacterClass(object):
 
 
 class CharacterSubclass(object):
+    __slots__ = ("id", "parent", "value")
+
     def __init__(self, id, parent, value):
         """
         :param id: int
@@ -74,6 +86,8 @@ class CharacterSubclass(object):
 
 
 class CharacterRace(object):
+    __slots__ = ("id", "value")
+
     def __init__(self, id, value):
         """
         :param id: int
@@ -85,6 +99,8 @@ class CharacterRace(object):
 
 
 class CharacterSubrace(object):
+    __slots__ = ("id", "parent", "value")
+
     def __init__(self, id, parent, value):
         """
         :param id: int
@@ -98,6 +114,8 @@ class CharacterSubrace(object):
 
 
 class GlobalModifier(object):
+    __slots__ = ("id", "value", "adjustment", "max")
+
     def __init__(self, id, value, adjustment, max):
         """
         :param id: int
@@ -113,6 +131,8 @@ class GlobalModifier(object):
 
 
 class HostStatus(object):
+    __slots__ = ("id", "value")
+
     def __init__(self, id, value):
         """
         :param id: int
@@ -124,6 +144,8 @@ class HostStatus(object):
 
 
 class ArenaTier(object):
+    __slots__ = ("id", "avg_level", "max_phases")
+
     def __init__(self, id, avg_level, max_phases):
         """
         :param id: int
@@ -137,6 +159,8 @@ class ArenaTier(object):
 
 
 class AdventureTier(object):
+    __slots__ = ("id", "avg_level")
+
     def __init__(self, id, avg_level):
         """
         :param id: int
@@ -148,6 +172,8 @@ class AdventureTier(object):
 
 
 class ShopType(object):
+    __slots__ = ("id", "value", "synonyms", "tools")
+
     def __init__(self, id, value, synonyms, tools):
         """
         :param id: int
@@ -163,6 +189,8 @@ class ShopType(object):
 
 
 class Activity(object):
+    __slots__ = ("id", "value", "ratio", "diversion")
+
     def __init__(self, id, value, ratio, diversion):
         """
         :param id: int
@@ -178,6 +206,8 @@ class Activity(object):
 
 
 class Faction(object):
+    __slots__ = ("id", "value")
+
     def __init__(self, id, value):
         """
         :param id: int
@@ -192,6 +222,8 @@ class Faction(object):
 
 
 class DashboardType(object):
+    __slots__ = ("id", "value")
+
     def __init__(self, id, value):
         """
         :param id: int
@@ -203,6 +235,8 @@ class DashboardType(object):
 
 
 class LevelCaps(object):
+    __slots__ = ("id", "max_gold", "max_xp")
+
     def __init__(self, id, max_gold, max_xp):
         """
         :param id: int
@@ -216,6 +250,8 @@ class LevelCaps(object):
 
 
 class AdventureRewards(object):
+    __slots__ = ("id", "ep", "tier", "rarity")
+
     def __init__(self, id, ep, tier, rarity = None):
         """
         :param id: int
@@ -231,6 +267,8 @@ class AdventureRewards(object):
 
 
 class ShopTier(object):
+    __slots__ = ("id", "rarity")
+
     def __init__(self, id, rarity):
         """
         :param id: int
@@ -12,9 +12,14 @@ class PlayerCharacterClass(object):
     subclass: CharacterSubclass
     active: bool
 
-    def __init__(self, **kwargs):
-        for key, value in kwargs.items():
-            setattr(self, key, value)
+    __slots__ = ("id", "character_id", "primary_class", "subclass", "active")
+
+    def __init__(self, id=None, character_id=None, primary_class=None, subclass=None, active=None):
+        self.id = id
+        self.character_id = character_id
+        self.primary_class = primary_class
+        self.subclass = subclass
+        self.active = active
 
     def get_formatted_class(self):
         if self.subclass is not None:
@@ -38,9 +43,24 @@ class PlayerCharacter(object):
     faction: Faction
     reroll: bool
 
-    def __init__(self, **kwargs):
-        for key, value in kwargs.items():
-            setattr(self, key, value)
+    __slots__ = ("id", "player_id", "guild_id", "name", "race", "subrace", "xp", "div_xp", "gold", "div_gold",
+                 "active", "faction", "reroll", "completed_rps", "needed_rps", "completed_arenas", "needed_arenas")
+
+    def __init__(self, id=None, player_id=None, guild_id=None, name=None, race=None, subrace=None, xp=None,
+                 div_xp=None, gold=None, div_gold=None, active=None, faction=None, reroll=None):
+        self.id = id
+        self.player_id = player_id
+        self.guild_id = guild_id
+        self.name = name
+        self.race = race
+        self.subrace = subrace
+        self.xp = xp
+        self.div_xp = div_xp
+        self.gold = gold
+        self.div_gold = div_gold
+        self.active = active
+        self.faction = faction
+        self.reroll = reroll
 
     def get_level(self):
         level = math.ceil((self.xp + 1) / 1000)
@@ -78,12 +98,25 @@ class PlayerGuild(object):
     max_reroll: int
     greeting: str
 
-    def __init__(self, **kwargs):
-        for key, value in kwargs.items():
-            setattr(self, key, value)
+    __slots__ = ("id", "max_level", "server_xp", "weeks", "week_xp", "xp_adjust", "max_reroll", "reset_day",
+                 "reset_hour", "last_reset", "greeting")
+
+    def __init__(self, id=None, max_level=None, server_xp=None, weeks=None, week_xp=None, xp_adjust=None,
+                 max_reroll=None, reset_day=None, reset_hour=None, last_reset=None, greeting=None):
+        self.id = id
+        self.max_level = max_level
+        self.server_xp = server_xp
+        self.weeks = weeks
+        self.week_xp = week_xp
+        self.xp_adjust = xp_adjust
+        self.max_reroll = max_reroll
+        self.reset_day = reset_day
+        self.reset_hour = reset_hour
+        self.last_reset = last_reset
+        self.greeting = greeting
 
     def get_reset_day(self):
-        if hasattr(self, "reset_day"):
+        if self.reset_day is not None:
             weekDays = ("Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday")
             return weekDays[self.reset_day]
 
@@ -133,9 +166,21 @@ class Adventure(object):
     category_channel_id: int
     ep: int
 
-    def __init__(self, **kwargs):
-        for key, value in kwargs.items():
-            setattr(self, key, value)
+    __slots__ = ("id", "guild_id", "name", "role_id", "dms", "tier", "category_channel_id", "ep", "created_ts",
+                 "end_ts")
+
+    def __init__(self, id=None, guild_id=None, name=None, role_id=None, dms=None, tier=None, category_channel_id=None,
+                 ep=None, created_ts=None, end_ts=None):
+        self.id = id
+        self.guild_id = guild_id
+        self.name = name
+        self.role_id = role_id
+        self.dms = dms
+        self.tier = tier
+        self.category_channel_id = category_channel_id
+        self.ep = ep
+        self.created_ts = created_ts
+        self.end_ts = end_ts
 
     def get_adventure_role(self, ctx: ApplicationContext) -> Role:
         return discord.utils.get(ctx.guild.roles, id=self.role_id)
@@ -153,9 +198,23 @@ class DBLog(object):
     adventure_id: int | None
     invalid: bool
 
-    def __init__(self, **kwargs):
-        for key, value in kwargs.items():
-            setattr(self, key, value)
+    __slots__ = ("id", "author", "xp", "server_xp", "gold", "created_ts", "character_id", "activity", "notes",
+                 "shop_id", "adventure_id", "invalid")
+
+    def __init__(self, id=None, author=None, xp=None, server_xp=None, gold=None, created_ts=None, character_id=None,
+                 activity=None, notes=None, shop_id=None, adventure_id=None, invalid=None):
+        self.id = id
+        self.author = author
+        self.xp = xp
+        self.server_xp = server_xp
+        self.gold = gold
+        self.created_ts = created_ts
+        self.character_id = character_id
+        self.activity = activity
+        self.notes = notes
+        self.shop_id = shop_id
+        self.adventure_id = adventure_id
+        self.invalid = invalid
 
     def get_author(self, ctx: ApplicationContext) -> discord.Member | None:
         return discord.utils.get(ctx.guild.members, id=self.author)
@@ -168,9 +227,20 @@ class Arena(object):
     tier: ArenaTier
     completed_phases: int
 
-    def __init__(self, **kwargs):
-        for key, value in kwargs.items():
-            setattr(self, key, value)
+    __slots__ = ("id", "channel_id", "pin_message_id", "role_id", "host_id", "tier", "completed_phases", "created_ts",
+                 "end_ts")
+
+    def __init__(self, id=None, channel_id=None, pin_message_id=None, role_id=None, host_id=None, tier=None,
+                 completed_phases=None, created_ts=None, end_ts=None):
+        self.id = id
+        self.channel_id = channel_id
+        self.pin_message_id = pin_message_id
+        self.role_id = role_id
+        self.host_id = host_id
+        self.tier = tier
+        self.completed_phases = completed_phases
+        self.created_ts = created_ts
+        self.end_ts = end_ts
 
     def get_role(self, ctx: ApplicationContext | discord.Interaction) -> Role:
         return discord.utils.get(ctx.guild.roles, id=self.role_id)
@@ -194,9 +264,26 @@ class Shop(object):
     inventory_rolled: bool
     active: bool
 
-    def __init__(self, **kwargs):
-        for key, value in kwargs.items():
-            setattr(self, key, value)
+    __slots__ = ("id", "guild_id", "name", "type", "owner_id", "channel_id", "shelf", "network", "mastery",
+                 "seeks_remaining", "max_cost", "seek_roll", "inventory_rolled", "active")
+
+    def __init__(self, id=None, guild_id=None, name=None, type=None, owner_id=None, channel_id=None, shelf=None,
+                 network=None, mastery=None, seeks_remaining=None, max_cost=None, seek_roll=None,
+                 inventory_rolled=None, active=None):
+        self.id = id
+        self.guild_id = guild_id
+        self.name = name
+        self.type = type
+        self.owner_id = owner_id
+        self.channel_id = channel_id
+        self.shelf = shelf
+        self.network = network
+        self.mastery = mastery
+        self.seeks_remaining = seeks_remaining
+        self.max_cost = max_cost
+        self.seek_roll = seek_roll
+        self.inventory_rolled = inventory_rolled
+        self.active = active
 
     def get_owner(self, ctx: ApplicationContext | discord.Interaction) -> discord.Member:
         return discord.utils.get(ctx.guild.members, id=self.owner_id)
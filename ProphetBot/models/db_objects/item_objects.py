@@ -15,9 +15,21 @@ class ItemBlacksmith(object):
     source: str
     notes: str
 
-    def __init__(self, **kwargs):
-        for key, value in kwargs.items():
-            setattr(self, key, value)
+    __slots__ = ("id", "name", "sub_type", "rarity", "cost", "item_modifier", "attunement", "seeking_only", "source",
+                 "notes")
+
+    def __init__(self, id=None, name=None, sub_type=None, rarity=None, cost=None, item_modifier=None, attunement=None,
+                 seeking_only=None, source=None, notes=None):
+        self.id = id
+        self.name = name
+        self.sub_type = sub_type
+        self.rarity = rarity
+        self.cost = cost
+        self.item_modifier = item_modifier
+        self.attunement = attunement
+        self.seeking_only = seeking_only
+        self.source = source
+        self.notes = notes
 
     def display_cost(self) -> str:
         if self.item_modifier:
@@ -35,9 +47,18 @@ class ItemWondrous(object):
     source: str
     notes: str
 
-    def __init__(self, **kwargs):
-        for key, value in kwargs.items():
-            setattr(self, key, value)
+    __slots__ = ("id", "name", "rarity", "cost", "attunement", "seeking_only", "source", "notes")
+
+    def __init__(self, id=None, name=None, rarity=None, cost=None, attunement=None, seeking_only=None, source=None,
+                 notes=None):
+        self.id = id
+        self.name = name
+        self.rarity = rarity
+        self.cost = cost
+        self.attunement = attunement
+        self.seeking_only = seeking_only
+        self.source = source
+        self.notes = notes
 
 
 class ItemConsumable(object):
@@ -50,9 +71,19 @@ class ItemConsumable(object):
     source: str
     notes: str
 
-    def __init__(self, **kwargs):
-        for key, value in kwargs.items():
-            setattr(self, key, value)
+    __slots__ = ("id", "name", "sub_type", "rarity", "cost", "attunement", "seeking_only", "source", "notes")
+
+    def __init__(self, id=None, name=None, sub_type=None, rarity=None, cost=None, attunement=None, seeking_only=None,
+                 source=None, notes=None):
+        self.id = id
+        self.name = name
+        self.sub_type = sub_type
+        self.rarity = rarity
+        self.cost = cost
+        self.attunement = attunement
+        self.seeking_only = seeking_only
+        self.source = source
+        self.notes = notes
 
 
 class ItemScroll(object):
@@ -65,9 +96,19 @@ class ItemScroll(object):
     source: str
     notes: str
 
-    def __init__(self, **kwargs):
-        for key, value in kwargs.items():
-            setattr(self, key, value)
+    __slots__ = ("id", "name", "rarity", "cost", "level", "school", "classes", "source", "notes")
+
+    def __init__(self, id=None, name=None, rarity=None, cost=None, level=None, school=None, classes=None, source=None,
+                 notes=None):
+        self.id = id
+        self.name = name
+        self.rarity = rarity
+        self.cost = cost
+        self.level = level
+        self.school = school
+        self.classes = classes
+        self.source = source
+        self.notes = notes
 
     def ordinal_suffix(self) -> str:
         tens = self.level % 10
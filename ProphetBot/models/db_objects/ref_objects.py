@@ -1,4 +1,4 @@
-from typing import List
+from typing import List, Dict
 
 import discord.utils
 from discord import ApplicationContext, TextChannel, CategoryChannel, Message, Bot
@@ -13,9 +13,16 @@ class RefCategoryDashboard(object):
     excluded_channel_ids: List[int]
     dashboard_type: int
 
-    def __init__(self, **kwargs):
-        for key, value in kwargs.items():
-            setattr(self, key, value)
+    __slots__ = ("category_channel_id", "dashboard_post_channel_id", "dashboard_post_id", "excluded_channel_ids",
+                 "dashboard_type")
+
+    def __init__(self, category_channel_id=None, dashboard_post_channel_id=None, dashboard_post_id=None,
+                 excluded_channel_ids=None, dashboard_type=None):
+        self.category_channel_id = category_channel_id
+        self.dashboard_post_channel_id = dashboard_post_channel_id
+        self.dashboard_post_id = dashboard_post_id
+        self.excluded_channel_ids = excluded_channel_ids
+        self.dashboard_type = dashboard_type
 
     def channels_to_check(self, bot: Bot) -> List[TextChannel]:
         category: CategoryChannel = bot.get_channel(self.category_channel_id)
@@ -38,6 +45,33 @@ class RefCategoryDashboard(object):
         return None
 
 
+class RefChannelLastMessage(object):
+    channel_id: int
+    category_channel_id: int
+    message_id: int | None
+    author_id: int | None
+    empty: bool
+    magewright: bool
+
+    __slots__ = ("channel_id", "category_channel_id", "message_id", "author_id", "empty", "magewright")
+
+    def __init__(self, channel_id=None, category_channel_id=None, message_id=None, author_id=None, empty=None,
+                 magewright=None):
+        self.channel_id = channel_id
+        self.category_channel_id = category_channel_id
+        self.message_id = message_id
+        self.author_id = author_id
+        self.empty = empty
+        self.magewright = magewright
+
+    def get_rp_status(self) -> str:
+        if self.empty:
+            return "Available"
+        elif self.magewright:
+            return "Magewright"
+        return "In Use"
+
+
 class RefWeeklyStipend(object):
     guild_id: int
     role_id: int
@@ -45,9 +79,14 @@ class RefWeeklyStipend(object):
     reason: str
     leadership: bool
 
-    def __init__(self, **kwargs):
-        for key, value in kwargs.items():
-            setattr(self, key, value)
+    __slots__ = ("guild_id", "role_id", "ratio", "reason", "leadership")
+
+    def __init__(self, guild_id=None, role_id=None, ratio=None, reason=None, leadership=None):
+        self.guild_id = guild_id
+        self.role_id = role_id
+        self.ratio = ratio
+        self.reason = reason
+        self.leadership = leadership
 
 
 class GlobalPlayer(object):
@@ -62,9 +101,22 @@ class GlobalPlayer(object):
     num_messages: int
     channels: List[int]
 
-    def __init__(self, **kwargs):
-        for key, value in kwargs.items():
-            setattr(self, key, value)
+    __slots__ = ("id", "guild_id", "player_id", "modifier", "host", "gold", "xp", "update", "active", "num_messages",
+                 "channels")
+
+    def __init__(self, id=None, guild_id=None, player_id=None, modifier=None, host=None, gold=None, xp=None,
+                 update=None, active=None, num_messages=None, channels=None):
+        self.id = id
+        self.guild_id = guild_id
+        self.player_id = player_id
+        self.modifier = modifier
+        self.host = host
+        self.gold = gold
+        self.xp = xp
+        self.update = update
+        self.active = active
+        self.num_messages = num_messages
+        self.channels = channels
 
     def get_name(self, ctx: ApplicationContext):
         try:
@@ -85,10 +137,20 @@ class GlobalEvent(object):
     base_mod: GlobalModifier
     combat: bool
     channels: List[int]
-
-    def __init__(self, **kwargs):
-        for key, value in kwargs.items():
-            setattr(self, key, value)
+    last_message_ids: Dict[int, int]
+
+    __slots__ = ("guild_id", "name", "base_gold", "base_xp", "base_mod", "combat", "channels", "last_message_ids")
+
+    def __init__(self, guild_id=None, name=None, base_gold=None, base_xp=None, base_mod=None, combat=None,
+                 channels=None, last_message_ids=None):
+        self.guild_id = guild_id
+        self.name = name
+        self.base_gold = base_gold
+        self.base_xp = base_xp
+        self.base_mod = base_mod
+        self.combat = combat
+        self.channels = channels
+        self.last_message_ids = last_message_ids
 
     def get_channel_names(self, bot: Bot):
         names = []
@@ -12,6 +12,17 @@ ref_category_dashboard_table = sa.Table(
     Column("dashboard_type", Integer, nullable=False)  # ref: > c_dashboard_type.id
 )
 
+ref_channel_last_message_table = sa.Table(
+    "ref_channel_last_message",
+    metadata,
+    Column("channel_id", BigInteger, primary_key=True, nullable=False),
+    Column("category_channel_id", BigInteger, nullable=False),  # ref: > ref_category_dashboard.category_channel_id
+    Column("message_id", BigInteger, nullable=True),
+    Column("author_id", BigInteger, nullable=True),
+    Column("empty", BOOLEAN, nullable=False, default=True),
+    Column("magewright", BOOLEAN, nullable=False, default=False)
+)
+
 ref_weekly_stipend_table = sa.Table(
     "ref_weekly_stipend",
     metadata,
@@ -34,6 +45,14 @@ ref_gb_staging_table = sa.Table(
     Column("channels", sa.ARRAY(BigInteger), nullable=True, default=[]),
 )
 
+ref_gb_staging_channel_table = sa.Table(
+    "ref_gb_staging_channel",
+    metadata,
+    Column("channel_id", BigInteger, primary_key=True, nullable=False),
+    Column("guild_id", BigInteger, nullable=False),  # ref: > ref_gb_staging.guild_id
+    Column("last_message_id", BigInteger, nullable=True)
+)
+
 ref_gb_staging_player_table = sa.Table(
     "ref_gb_staging_player",
     metadata,
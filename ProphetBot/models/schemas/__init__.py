@@ -1,3 +1,4 @@
 from .entity_schema import *
 from .category_schema import *
 from .ref_schema import *
+from .row_mapper import RowMapper, row_mapper
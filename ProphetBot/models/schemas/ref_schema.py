@@ -15,6 +15,19 @@ class RefCategoryDashboardSchema(Schema):
         return RefCategoryDashboard(**data)
 
 
+class RefChannelLastMessageSchema(Schema):
+    channel_id = fields.Integer(data_key="channel_id", required=True)
+    category_channel_id = fields.Integer(data_key="category_channel_id", required=True)
+    message_id = fields.Integer(data_key="message_id", required=False, allow_none=True)
+    author_id = fields.Integer(data_key="author_id", required=False, allow_none=True)
+    empty = fields.Boolean(data_key="empty", required=True)
+    magewright = fields.Boolean(data_key="magewright", required=True)
+
+    @post_load
+    def make_last_message(self, data, **kwargs):
+        return RefChannelLastMessage(**data)
+
+
 class RefWeeklyStipendSchema(Schema):
     role_id = fields.Integer(data_key="role_id", required=True)
     guild_id = fields.Integer(data_key="guild_id", required=True)
@@ -0,0 +1,70 @@
+import copy
+from functools import lru_cache
+
+from marshmallow import Schema, fields, missing
+from marshmallow.decorators import POST_LOAD
+
+
+class RowMapper(object):
+    """
+    Precompiled loader for a marshmallow Schema. The schema's fields are walked once to build a list of
+    (attribute, column, converter) steps, so loading a row is a single pass over that list followed by the schema's
+    post_load hook. Validation is skipped since rows come straight from our own tables.
+    """
+
+    def __init__(self, schema: Schema):
+        self.schema = schema
+        self.steps = []
+        self.defaults = []
+        self.hooks = self._get_post_load_hooks(schema)
+
+        for name, field in schema.load_fields.items():
+            column = field.data_key or name
+            self.steps.append((name, column, self._get_converter(schema, field)))
+
+            if field.load_default is not missing:
+                self.defaults.append((name, field.load_default))
+
+    @staticmethod
+    def _get_post_load_hooks(schema: Schema) -> list:
+        # @post_load tags the decorated method with __marshmallow_hook__, keyed by (tag, pass_many)
+        return [getattr(schema, name) for name in dir(type(schema))
+                if (POST_LOAD, False) in getattr(getattr(type(schema), name, None), "__marshmallow_hook__", {})]
+
+    @staticmethod
+    def _get_converter(schema: Schema, field: fields.Field):
+        if isinstance(field, fields.Method):
+            return getattr(schema, field.deserialize_method_name)
+        elif isinstance(field, fields.Float):
+            return float
+        elif isinstance(field, fields.List):
+            return list
+        return None
+
+    def load(self, row) -> object:
+        data = dict()
+
+        for name, default in self.defaults:
+            data[name] = default() if callable(default) else copy.copy(default)
+
+        for name, column, converter in self.steps:
+            if column in row:
+                value = row[column]
+                data[name] = value if value is None or converter is None else converter(value)
+
+        for hook in self.hooks:
+            data = hook(data)
+
+        return data
+
+
+@lru_cache(maxsize=None)
+def row_mapper(schema: type, compendium=None) -> RowMapper:
+    """
+    Gets the RowMapper for a Schema class, building it on first use
+
+    :param schema: Schema class
+    :param compendium: Compendium for schemas that resolve category references
+    :return: RowMapper
+    """
+    return RowMapper(schema() if compendium is None else schema(compendium))
@@ -1,4 +1,6 @@
 from ProphetBot.models.db_tables import *
+from sqlalchemy import Table, select, func, literal, literal_column, union_all
+from sqlalchemy.dialects.postgresql import aggregate_order_by
 from sqlalchemy.sql.selectable import FromClause
 
 
@@ -76,3 +78,14 @@ def get_c_adventure_rewards() -> FromClause:
 
 def get_c_shop_tiers() -> FromClause:
     return c_shop_tier_table.select()
+
+
+def get_category_checksums(tables: list[Table]) -> FromClause:
+    return union_all(*[
+        select(
+            literal(t.name).label("table_name"),
+            func.md5(func.coalesce(
+                func.string_agg(literal_column(f"{t.name}::text"), aggregate_order_by(literal(","), t.c.id)), ""
+            )).label("checksum")
+        ).select_from(t) for t in tables
+    ])
@@ -1,4 +1,4 @@
-from sqlalchemy import and_
+from sqlalchemy import and_, select, func, values, column, Integer
 from sqlalchemy.sql import FromClause
 
 from ProphetBot.models.db_objects import PlayerCharacter, PlayerCharacterClass
@@ -96,7 +96,45 @@ def get_multiple_characters(players: list[int], guild_id: int) -> FromClause:
     ).order_by(characters_table.c.id.desc())
 
 
+def get_guild_character_xp(guild_id: int) -> FromClause:
+    return select([characters_table.c.id, characters_table.c.xp]).where(
+        and_(characters_table.c.active == True, characters_table.c.guild_id == guild_id)
+    )
+
+
 def get_characters(guild_id: int) -> FromClause:
     return characters_table.select().where(
         and_(characters_table.c.active == True, characters_table.c.guild_id == guild_id)
     ).order_by(characters_table.c.id.desc())
+
+
+def get_guild_weekly_totals(guild_id: int) -> FromClause:
+    return select(
+        func.coalesce(func.sum(characters_table.c.div_xp), 0).label("player_xp"),
+        func.coalesce(func.sum(characters_table.c.div_gold), 0).label("player_gold")
+    ).where(
+        and_(characters_table.c.active == True, characters_table.c.guild_id == guild_id)
+    )
+
+
+def reset_weekly_diversion(guild_id: int):
+    return characters_table.update() \
+        .where(and_(characters_table.c.active == True, characters_table.c.guild_id == guild_id)) \
+        .values(div_xp=0, div_gold=0)
+
+
+def update_character_balances(characters: list[PlayerCharacter]):
+    balances = values(
+        column("id", Integer), column("xp", Integer), column("div_xp", Integer), column("gold", Integer),
+        column("div_gold", Integer),
+        name="balances"
+    ).data([(c.id, c.xp, c.div_xp, c.gold, c.div_gold) for c in characters])
+
+    return characters_table.update() \
+        .where(characters_table.c.id == balances.c.id) \
+        .values(
+        xp=balances.c.xp,
+        div_xp=balances.c.div_xp,
+        gold=balances.c.gold,
+        div_gold=balances.c.div_gold
+    )
@@ -2,6 +2,7 @@ from datetime import datetime, timedelta
 
 from sqlalchemy.sql.selectable import FromClause
 from sqlalchemy import and_, null
+from sqlalchemy.dialects.postgresql import insert
 from ProphetBot.models.db_tables import guilds_table, adventures_table, arenas_table, shops_table
 from ProphetBot.models.db_objects import PlayerGuild, Adventure, Arena, Shop
 
@@ -21,13 +22,18 @@ def get_guilds_with_reset(day: int, hour: int) -> FromClause:
 
 
 def insert_new_guild(guild: PlayerGuild):
-    return guilds_table.insert().values(
+    # No-op update on conflict so the existing row is still returned if another insert won the race
+    stmt = insert(guilds_table).values(
         id=guild.id,
         max_level=guild.max_level,
         server_xp=guild.server_xp,
         weeks=guild.weeks,
         max_reroll=guild.max_reroll,
         xp_adjust=guild.xp_adjust
+    )
+    return stmt.on_conflict_do_update(
+        index_elements=[guilds_table.c.id],
+        set_=dict(id=stmt.excluded.id)
     ).returning(guilds_table)
 
 
@@ -39,6 +45,7 @@ def update_guild(guild: PlayerGuild):
         server_xp=guild.server_xp,
         weeks=guild.weeks,
         week_xp=guild.week_xp,
+        max_reroll=guild.max_reroll,
         xp_adjust=guild.xp_adjust,
         reset_day=None if not hasattr(guild, "reset_day") else guild.reset_day,
         reset_hour=None if not hasattr(guild, "reset_hour") else guild.reset_hour,
@@ -143,7 +150,7 @@ def insert_new_shop(shop: Shop):
         seek_roll=shop.seek_roll,
         inventory_rolled=shop.inventory_rolled,
         active=shop.active
-    )
+    ).returning(shops_table)
 
 
 def update_shop(shop: Shop):
@@ -182,3 +189,12 @@ def get_shops(guild_id: int) -> FromClause:
     return shops_table.select().where(
         and_(shops_table.c.guild_id == guild_id, shops_table.c.active == True)
     ).order_by(shops_table.c.id)
+
+
+def reset_guild_shops(guild_id: int):
+    return shops_table.update() \
+        .where(and_(shops_table.c.guild_id == guild_id, shops_table.c.active == True)) \
+        .values(
+        seeks_remaining=1 + shops_table.c.network,
+        inventory_rolled=False
+    )
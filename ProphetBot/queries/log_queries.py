@@ -1,14 +1,14 @@
 from datetime import datetime, timedelta
 
-from sqlalchemy import and_
+from sqlalchemy import and_, select
 from sqlalchemy.sql import FromClause
 
 from ProphetBot.models.db_objects import DBLog
-from ProphetBot.models.db_tables import log_table
+from ProphetBot.models.db_tables import log_table, characters_table
 
 
-def insert_new_log(log: DBLog):
-    return log_table.insert().values(
+def _log_values(log: DBLog) -> dict:
+    return dict(
         author=log.author,
         xp=log.xp,
         server_xp=log.server_xp,
@@ -19,7 +19,15 @@ def insert_new_log(log: DBLog):
         shop_id=None if not hasattr(log, "shop_id") else log.shop_id,
         adventure_id=None if not hasattr(log, "adventure_id") else log.adventure_id,
         invalid=log.invalid
-    ).returning(log_table)
+    )
+
+
+def insert_new_log(log: DBLog):
+    return log_table.insert().values(**_log_values(log)).returning(log_table)
+
+
+def insert_new_logs(logs: list[DBLog]):
+    return log_table.insert().values([_log_values(log) for log in logs]).returning(log_table)
 
 
 def get_n_player_logs(char_id: int, n: int) -> FromClause:
@@ -36,6 +44,18 @@ def get_logs_in_past(char_id: int) -> FromClause:
     ).order_by(log_table.c.id.desc())
 
 
+def get_guild_character_activity(guild_id: int) -> FromClause:
+    lookback = datetime.today() - timedelta(days=30)
+    recent_logs = select(log_table.c.id).where(
+        and_(log_table.c.character_id == characters_table.c.id, log_table.c.created_ts > lookback,
+             log_table.c.invalid == False)
+    ).exists()
+
+    return select(characters_table, recent_logs.label("recent_activity")).where(
+        and_(characters_table.c.active == True, characters_table.c.guild_id == guild_id)
+    ).order_by(characters_table.c.id.desc())
+
+
 def get_log_by_player_and_activity(char_id: int, act_id: int) -> FromClause:
     return log_table.select().where(
         and_(log_table.c.character_id == char_id, log_table.c.activity == act_id, log_table.c.invalid == False)
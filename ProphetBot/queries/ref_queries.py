@@ -1,10 +1,12 @@
 from typing import List
 
 from ProphetBot.models.db_tables import *
-from sqlalchemy import null, and_, or_
+from sqlalchemy import null, and_, or_, values, column, cast, Integer, BigInteger, Boolean, ARRAY
+from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.sql.selectable import FromClause, TableClause
 
-from ProphetBot.models.db_objects import RefCategoryDashboard, RefWeeklyStipend, GlobalEvent, GlobalPlayer
+from ProphetBot.models.db_objects import RefCategoryDashboard, RefWeeklyStipend, GlobalEvent, GlobalPlayer, \
+    RefChannelLastMessage
 
 
 def get_dashboard_by_category_channel(category_channel_id: int) -> FromClause:
@@ -47,6 +49,40 @@ def delete_dashboard(dashboard: RefCategoryDashboard) -> TableClause:
     )
 
 
+def get_channel_last_messages() -> FromClause:
+    return ref_channel_last_message_table.select()
+
+
+def upsert_channel_last_messages(summaries: List[RefChannelLastMessage]) -> TableClause:
+    stmt = insert(ref_channel_last_message_table).values([
+        dict(
+            channel_id=s.channel_id,
+            category_channel_id=s.category_channel_id,
+            message_id=s.message_id,
+            author_id=s.author_id,
+            empty=s.empty,
+            magewright=s.magewright
+        ) for s in summaries
+    ])
+
+    return stmt.on_conflict_do_update(
+        index_elements=[ref_channel_last_message_table.c.channel_id],
+        set_=dict(
+            category_channel_id=stmt.excluded.category_channel_id,
+            message_id=stmt.excluded.message_id,
+            author_id=stmt.excluded.author_id,
+            empty=stmt.excluded.empty,
+            magewright=stmt.excluded.magewright
+        )
+    )
+
+
+def delete_channel_last_messages(channel_ids: List[int]) -> TableClause:
+    return ref_channel_last_message_table.delete().where(
+        ref_channel_last_message_table.c.channel_id.in_(channel_ids)
+    )
+
+
 def get_weekly_stipend_query(role_id: int) -> FromClause:
     return ref_weekly_stipend_table.select().where(
         ref_weekly_stipend_table.c.role_id == role_id
@@ -101,6 +137,10 @@ def get_active_global(guild_id: int) -> FromClause:
     )
 
 
+def get_active_globals() -> FromClause:
+    return ref_gb_staging_table.select()
+
+
 def update_global_event(g_event: GlobalEvent):
     return ref_gb_staging_table.update() \
         .where(ref_gb_staging_table.c.guild_id == g_event.guild_id) \
@@ -114,6 +154,35 @@ def update_global_event(g_event: GlobalEvent):
     )
 
 
+def get_global_channels(guild_id: int) -> FromClause:
+    return ref_gb_staging_channel_table.select().where(
+        ref_gb_staging_channel_table.c.guild_id == guild_id
+    )
+
+
+def upsert_global_channels(guild_id: int, last_message_ids: dict[int, int]) -> TableClause:
+    stmt = insert(ref_gb_staging_channel_table).values([
+        dict(
+            channel_id=channel_id,
+            guild_id=guild_id,
+            last_message_id=message_id
+        ) for channel_id, message_id in last_message_ids.items()
+    ])
+
+    return stmt.on_conflict_do_update(
+        index_elements=[ref_gb_staging_channel_table.c.channel_id],
+        set_=dict(
+            guild_id=stmt.excluded.guild_id,
+            last_message_id=stmt.excluded.last_message_id
+        )
+    )
+
+
+def delete_global_channels(guild_id: int) -> TableClause:
+    return ref_gb_staging_channel_table.delete() \
+        .where(ref_gb_staging_channel_table.c.guild_id == guild_id)
+
+
 def get_all_global_players(guild_id: int) -> FromClause:
     return ref_gb_staging_player_table.select().where(
         ref_gb_staging_player_table.c.guild_id == guild_id
@@ -165,3 +234,41 @@ def add_global_player(g_player: GlobalPlayer):
         channels=g_player.channels
     ).returning(ref_gb_staging_player_table)
 
+
+def add_global_players(g_players: list[GlobalPlayer]):
+    return ref_gb_staging_player_table.insert().values([
+        dict(guild_id=p.guild_id,
+             player_id=p.player_id,
+             modifier=p.modifier.id,
+             host=None if p.host is None else p.host.id,
+             gold=p.gold,
+             xp=p.xp,
+             update=p.update,
+             active=p.active,
+             num_messages=p.num_messages,
+             channels=p.channels) for p in g_players
+    ]).returning(ref_gb_staging_player_table)
+
+
+def update_global_players(g_players: list[GlobalPlayer]):
+    players = values(
+        column("id", Integer), column("modifier", Integer), column("host", Integer), column("gold", Integer),
+        column("xp", Integer), column("update", Boolean), column("active", Boolean), column("num_messages", Integer),
+        column("channels", ARRAY(BigInteger)),
+        name="players"
+    ).data([(p.id, p.modifier.id, None if p.host is None else p.host.id, p.gold, p.xp, p.update, p.active,
+             p.num_messages, p.channels) for p in g_players])
+
+    # Casts keep Postgres from typing an all-NULL host column as text
+    return ref_gb_staging_player_table.update() \
+        .where(ref_gb_staging_player_table.c.id == players.c.id) \
+        .values(
+        modifier=players.c.modifier,
+        host=cast(players.c.host, Integer),
+        gold=players.c.gold,
+        xp=players.c.xp,
+        update=players.c["update"],
+        active=players.c.active,
+        num_messages=players.c.num_messages,
+        channels=players.c.channels
+    )
@@ -0,0 +1,66 @@
+import asyncio
+import logging
+from time import monotonic
+from typing import Callable, Hashable, Awaitable
+
+log = logging.getLogger(__name__)
+
+
+class EditScheduler(object):
+    """
+    Coalesces bursts of edits to the same target. Each key gets at most one edit per window. A pending edit is replaced
+    by a later one of the same or higher priority, so the target ends up showing the latest state, but a cheap partial
+    edit never throws away a pending full refresh that already covers it.
+    """
+
+    def __init__(self, name: str, window: float):
+        self.name = name
+        self.window = window
+        self.pending = dict()
+        self.tasks = dict()
+        self.last_flush = dict()
+        self.suppressed = 0
+        self.flushed = 0
+
+    def __len__(self):
+        return len(self.pending)
+
+    def schedule(self, key: Hashable, edit: Callable[[], Awaitable], priority: int = 0):
+        """
+        Queues an edit for key, replacing any edit for it that has not been sent yet unless that edit has a higher
+        priority
+
+        :param key: Edit target, e.g. a dashboard's category channel id
+        :param edit: Coroutine function performing the edit. It should read the current state when called
+        :param priority: Edits that redo everything a lower priority edit would should be given a higher priority
+        """
+        if key in self.pending:
+            self.suppressed += 1
+            if self.pending[key][0] > priority:
+                return
+        self.pending[key] = (priority, edit)
+
+        if key not in self.tasks:
+            self.tasks[key] = asyncio.ensure_future(self._flush(key))
+
+    async def _flush(self, key: Hashable):
+        while key in self.pending:
+            delay = self.last_flush.get(key, 0) + self.window - monotonic()
+            if delay > 0:
+                await asyncio.sleep(delay)
+
+            _, edit = self.pending.pop(key)
+            self.last_flush[key] = monotonic()
+
+            try:
+                await edit()
+                self.flushed += 1
+            except Exception as e:
+                log.error(f"{self.name}: Edit for {key} failed: {e}")
+
+        # No awaits between the loop check and here, so a new schedule() either lands in pending above or sees the
+        # task gone and starts a fresh one.
+        self.tasks.pop(key, None)
+
+    def stats(self) -> str:
+        return f"{self.name}: {len(self.pending)} pending | {self.flushed} flushed | {self.suppressed} suppressed"